@@ -1,40 +1,118 @@
 import logging
 import os.path
 import tkinter.font as tk_font
-from math import sqrt, ceil
-from tkinter import ALL, Canvas, StringVar, Tk, E, N, S, W, filedialog, DISABLED, NORMAL
+from argparse import Namespace
+from queue import Empty, Queue
+from threading import Thread
+from tkinter import Canvas, StringVar, Tk, E, N, S, W, filedialog, DISABLED, NORMAL
 from tkinter.ttk import Button, Frame, Label
 
+from batch import run_batch
+from bounds import BOUNDS
+from eco import EcoPartitioner
+from fm import FMPartitioner
+from kway import KWayPartitioner
+from model.cache import CACHE_DIR
 from model.circuit import Circuit
+from model.state import STATES
+from multilevel import MATCHINGS, MultilevelPartitioner
+from ordering import ORDERS
 from partitioning import Partitioner
-from util.constants import LEFT, RIGHT, LEFT_COLOR, RIGHT_COLOR
+from renderer import CanvasRenderer
+from sa import SAPartitioner
+from telemetry import Telemetry
 from util.logging import init_logging
+from util.profiling import disable_profiling, enable_profiling
 from util.result import read_result
+from window import WindowRefiner
+
+# the number of milliseconds between two polls of the results of the search
+POLL_INTERVAL = 100
+# the kinds of the messages from the thread of the search
+INCUMBENT, DONE, FAILED = range(3)
+
+
+def create_partitioner(args):
+    """
+    :param args: the command line arguments
+    :return: the partitioner selected by the arguments
+    """
+    if args.eco:  # the cells around the change are searched with the others fixed
+        exact = args.algo == "bnb"
+        solver = (
+            create_partitioner(
+                Namespace(**dict(vars(args), eco=None, kway=2, window=None))
+            )
+            if exact
+            else FMPartitioner()
+        )
+        return EcoPartitioner(args.eco, args.eco_result, solver, args.eco_window)
+
+    if args.kway > 2:  # the processes bisect the parts, one process per bisection
+        bisector = create_partitioner(Namespace(**dict(vars(args), kway=2, jobs=1)))
+        return KWayPartitioner(args.kway, bisector, args.jobs)
+
+    if args.window:  # the windows are searched exactly, one process per window
+        partitioner = create_partitioner(Namespace(**dict(vars(args), window=None)))
+        solver = Partitioner(
+            BOUNDS[args.bound](),
+            ORDERS[args.order],
+            telemetry=Telemetry(None),
+            state=STATES[args.state],
+        )
+        return WindowRefiner(partitioner, args.window, args.jobs, solver)
+
+    if args.algo == "fm":
+        return FMPartitioner()
+
+    if args.algo == "sa":
+        return SAPartitioner(
+            args.sa_restarts,
+            args.sa_cooling,
+            iterations=args.sa_iterations,
+            time_limit=args.time_limit,
+            jobs=args.jobs,
+            seed=args.sa_seed,
+            trace=args.trace,
+        )
 
-
-def count(assigned):
-    left, right = 0, 0
-    for num in assigned:
-        if num == LEFT:
-            left += 1
-        elif num == RIGHT:
-            right += 1
-    return left, right
+    initial = FMPartitioner() if args.init == "fm" else None
+    partitioner = Partitioner(
+        BOUNDS[args.bound](),
+        ORDERS[args.order],
+        args.jobs,
+        initial,
+        args.time_limit,
+        args.checkpoint,
+        Telemetry(args.report_interval, args.trace),
+        args.warm_start,
+        STATES[args.state],
+    )
+    if args.algo == "multilevel":
+        return MultilevelPartitioner(
+            MATCHINGS[args.matching], args.coarsest, partitioner
+        )
+    return partitioner
 
 
 class App:
     def __init__(self, args=None) -> None:
         init_logging(args.verbose)
 
-        self.circuit = Circuit()
-        self.partitioner = Partitioner()
+        self.circuit = Circuit(None if args.no_cache else CACHE_DIR)
+        self.partitioner = create_partitioner(args)
+        self.results = Queue()  # the messages from the thread of the search
 
         # if no_gui and infile are set, test benchmark directly without gui
         if args.no_gui and args.infile:
+            if args.profile:
+                enable_profiling(args.profile_dump)
             self.__test_benchmark(args.infile)
+            if args.profile:
+                logging.info("phases:\n{}".format(disable_profiling()))
         elif args.all:  # if all is set, test all benchmarks without gui
-            for file in os.scandir("benchmarks"):
-                self.__test_benchmark(file)
+            files = sorted(file.path for file in os.scandir("benchmarks"))
+            run_batch(files, args, args.workers, args.timeout, args.summary)
         else:  # otherwise, display GUI
             self.root = Tk()
             self.__init_gui()
@@ -67,7 +145,11 @@ class App:
         filename = filedialog.askopenfilename(
             initialdir="benchmarks",
             title="Select file",
-            filetypes=[("Text files", "*.txt"), ("all files", "*.*")],
+            filetypes=[
+                ("Text files", "*.txt"),
+                ("hMETIS files", "*.hgr"),
+                ("all files", "*.*"),
+            ],
         )
 
         if not filename:
@@ -76,7 +158,7 @@ class App:
         self.__load_benchmark(filename)
 
         self.root.nametowidget("btm.partition")["state"] = NORMAL
-        self.root.nametowidget("top.canvas").delete(ALL)
+        self.renderer.clear()
 
     def __load_benchmark(self, filename):
         """
@@ -92,13 +174,81 @@ class App:
 
     def __partitioning(self):
         """
-        called when "partition" is pressed, execture the branch and bound partitioning
+        called when "partition" is pressed, execute the partitioning in a background
+        thread, so the window stays responsive, the incumbents found by the search
+        come back through the results queue, which is polled by the Tk event loop
         """
-        cost, assignment = self.partitioner.partition(self.circuit)
-        self.__update_canvas(assignment)
-        self.__update_cost(cost)
+        self.results = Queue()
+        telemetry = getattr(self.partitioner, "telemetry", None)
+        if telemetry is not None:
+            results = self.results
+            telemetry.listener = lambda label, assigned: results.put(
+                (INCUMBENT, label, assigned)
+            )
 
-        self.root.nametowidget("btm.partition")["state"] = DISABLED
+        self.__update_buttons(running=True)
+        Thread(target=self.__run_partitioner, args=(self.results,), daemon=True).start()
+        self.root.after(POLL_INTERVAL, self.__poll_results)
+
+    def __run_partitioner(self, results):
+        """
+        the thread of the search
+        :param results: the queue to put the result into
+        """
+        try:
+            cost, assignment = self.partitioner.partition(self.circuit)
+            results.put((DONE, cost, assignment))
+        except Exception:
+            logging.exception("partitioning failed")
+            results.put((FAILED, None, None))
+
+    def __poll_results(self):
+        """
+        show the latest result from the thread of the search, and poll again until
+        the search is done
+        """
+        kind, latest = None, None
+        while kind not in (DONE, FAILED):
+            try:
+                kind, cost, assignment = self.results.get_nowait()
+            except Empty:
+                break
+            if (
+                assignment is not None
+                and len(assignment) == self.circuit.get_cells_size()
+            ):
+                latest = cost, assignment  # only the latest one is drawn
+
+        if latest is not None:
+            self.__update_canvas(latest[1])
+            self.__update_cost(latest[0])
+
+        if kind in (DONE, FAILED):
+            self.__update_buttons(running=False, done=kind == DONE)
+        else:
+            self.root.after(POLL_INTERVAL, self.__poll_results)
+
+    def __cancel(self):
+        """
+        called when "cancel" is pressed, stop the search, its best result so far is
+        still shown when the thread of the search is done
+        """
+        self.partitioner.cancel()
+        self.root.nametowidget("btm.cancel")["state"] = DISABLED
+
+    def __update_buttons(self, running, done=False):
+        """
+        :param running: whether a search is running
+        :param done: whether the search finished with a result
+        """
+        cancellable = hasattr(self.partitioner, "cancel")
+        self.root.nametowidget("btm.open")["state"] = DISABLED if running else NORMAL
+        self.root.nametowidget("btm.partition")["state"] = (
+            DISABLED if running or done else NORMAL
+        )
+        self.root.nametowidget("btm.cancel")["state"] = (
+            NORMAL if running and cancellable else DISABLED
+        )
 
     def __init_gui(self):
         """
@@ -117,6 +267,11 @@ class App:
         # add canvas to the top frame
         canvas = Canvas(top_frame, width=500, height=400, bg="gray66", name="canvas")
         canvas.grid(column=0, row=0, sticky=E + W + N + S)
+        self.renderer = CanvasRenderer(
+            canvas,
+            self.root.winfo_screenwidth() * 0.8,
+            self.root.winfo_screenheight() * 0.8,
+        )
 
         # set up the bottom / button frame
         btm_frame = Frame(self.root, name="btm")
@@ -138,6 +293,13 @@ class App:
         partition_button.grid(column=2, row=0, padx=5, pady=5)
         partition_button["state"] = DISABLED
 
+        # add cancel button to the bottom frame
+        cancel_button = Button(
+            btm_frame, text="cancel", command=self.__cancel, name="cancel"
+        )
+        cancel_button.grid(column=3, row=0, padx=5, pady=5)
+        cancel_button["state"] = DISABLED
+
         # set up the info frame
         info_frame = Frame(self.root, name="info")
         info_frame.grid(column=2, row=0, rowspan=2, sticky=E + W)
@@ -158,72 +320,7 @@ class App:
         """
         update the canvas, with the given circuit, and assignment
         """
-        canvas = self.root.nametowidget("top.canvas")
-        # clear the canvas
-        canvas.delete(ALL)
-
-        left_cols, right_cols, size = self.__update_canvas_size(canvas, assignment)
-        self.__update_cells(canvas, assignment, size, left_cols, right_cols)
-        self.__update_nets(canvas)
-
-    def __update_canvas_size(self, canvas, assignment):
-        left, right = count(assignment)
-
-        left_cols, right_cols = ceil(sqrt(left)), ceil(sqrt(right))
-        left_rows, right_rows = ceil(left / left_cols), ceil(right / right_cols)
-        rows, cols = max(left_rows, right_rows), left_cols + right_cols
-
-        w_size = self.root.winfo_screenwidth() * 0.8 / (cols + 3)
-        h_size = self.root.winfo_screenheight() * 0.8 / rows
-        # calculate the size of cells in the canvas, depends on the number of rows and cols
-        size = int(min(w_size, h_size))
-
-        offset_x, offset_y = size // 2, size // 2
-
-        canvas_width = (cols + 1) * size + 2 * offset_x
-        canvas_height = rows * size + (rows - 1) * 0.5 * size + 2 * offset_y
-        canvas.config(width=canvas_width, height=canvas_height)
-
-        return left_cols, right_cols, size
-
-    def __update_cells(self, canvas, assignment, size, left_cols, right_cols):
-        left_index, right_index = 0, 0
-
-        left_offset_x, right_offset_x, offset_y = (
-            size // 2,
-            size // 2 + (left_cols + 1) * size,
-            size // 2,
-        )
-
-        for i, val in enumerate(assignment):
-            cell = self.circuit.get_cell(i)
-            if val == LEFT:
-                cell.x, cell.y = left_index % left_cols, int(left_index / left_cols)
-                x1, y1 = left_offset_x + cell.x * size, cell.y * size * 1.5 + offset_y
-                x2, y2 = x1 + size, y1 + size
-                cell.rect_id = canvas.create_rectangle(x1, y1, x2, y2, fill=LEFT_COLOR)
-                left_index += 1
-            else:
-                cell.x, cell.y = right_index % right_cols, int(right_index / right_cols)
-                x1, y1 = right_offset_x + cell.x * size, cell.y * size * 1.5 + offset_y
-                x2, y2 = x1 + size, y1 + size
-                cell.rect_id = canvas.create_rectangle(x1, y1, x2, y2, fill=RIGHT_COLOR)
-                right_index += 1
-
-            cell.set_text(canvas)
-
-    def __update_nets(self, canvas):
-        canvas.delete("netlist")
-
-        for i in range(self.circuit.get_nets_size()):
-            net = self.circuit.get_net(i)
-            source = net.get_source()
-            x1, y1 = source.center_coords(canvas)
-            for sink in net.get_sinks():
-                x2, y2 = sink.center_coords(canvas)
-                canvas.create_line(
-                    x1, y1, x2, y2, fill=net.color, tags="netlist", width=1.5
-                )
+        self.renderer.draw(self.circuit.get_netlist(), assignment)
 
     def __update_cost(self, cost):
         self.__update_info("info.cost", cost)
@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import time
+from argparse import Namespace
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+
+from model.cache import CACHE_DIR
+from model.circuit import Circuit
+from util.profiling import disable_profiling, enable_profiling
+
+# the number of seconds a benchmark may overrun its timeout before it is killed
+GRACE = 10
+
+COLUMNS = ["benchmark", "status", "cells", "nets", "cut", "nodes", "pruned", "time"]
+
+
+def _run_benchmark(file, args, timeout, conn):
+    """
+    partition a benchmark in a worker process, and report its summary
+    :param file: the benchmark file
+    :param args: the command line arguments
+    :param timeout: the number of seconds the search may run, None for no limit
+    :param conn: the sending end of the pipe of the worker
+    """
+    from app import create_partitioner
+
+    start = time.time()
+    name = os.path.basename(file)
+    summary = {"benchmark": name}
+    if args.profile:
+        dump = "{}-{}".format(args.profile_dump, name) if args.profile_dump else None
+        enable_profiling(dump)
+    try:
+        circuit = Circuit(None if args.no_cache else CACHE_DIR)
+        circuit.parse_file(file)
+
+        options = Namespace(**vars(args))
+        if timeout is not None:
+            options.time_limit = min(timeout, args.time_limit or timeout)
+        if args.checkpoint:
+            options.checkpoint = "{}-{}".format(args.checkpoint, circuit.benchmark)
+        if args.trace:
+            options.trace = "{}-{}".format(args.trace, circuit.benchmark)
+        partitioner = create_partitioner(options)
+        cut, _ = partitioner.partition(circuit)
+
+        n: int = circuit.get_cells_size()
+        lower = getattr(partitioner, "lower", None)
+        pruned = getattr(partitioner, "pruned", None)
+        if lower is None:  # a heuristic, nothing is proven
+            status = "done"
+        else:
+            status = "optimal" if lower == cut else "timeout"
+        summary.update(
+            status=status,
+            cells=n,
+            nets=circuit.get_nets_size(),
+            cut=cut,
+            lower=lower,
+            nodes=getattr(partitioner, "nodes", None),
+            pruned=None if pruned is None else pruned / (1 << n),
+        )
+        if hasattr(partitioner, "telemetry"):
+            summary.update(partitioner.telemetry.as_dict())
+    except Exception as e:
+        logging.exception("benchmark {} failed".format(file))
+        summary.update(status="error", error=str(e))
+
+    profiler = disable_profiling()
+    if profiler is not None:
+        summary["phases"] = profiler.as_dict()
+    summary["time"] = time.time() - start
+    conn.send(summary)
+    conn.close()
+
+
+def run_batch(files, args, workers=1, timeout=None, summary_file=None):
+    """
+    partition the benchmarks concurrently, every benchmark in its own process,
+    a benchmark is stopped with its best result after timeout seconds, and killed
+    if it doesn't stop within GRACE more seconds
+    :param files: the benchmark files
+    :param args: the command line arguments
+    :param workers: the number of benchmarks partitioned at the same time
+    :param timeout: the number of seconds per benchmark, None for no limit
+    :param summary_file: the json file to save the summary into
+    :return: the summary of every benchmark, in the order of files
+    """
+    pending = list(files)
+    running = {}  # benchmark name -> (file, process, receiving end, start time)
+    summaries = {}
+
+    while pending or running:
+        while pending and len(running) < workers:
+            file = pending.pop(0)
+            receiver, sender = Pipe(duplex=False)
+            process = Process(target=_run_benchmark, args=(file, args, timeout, sender))
+            process.start()
+            sender.close()
+            running[os.path.basename(file)] = (file, process, receiver, time.time())
+
+        # every worker has its own pipe, so killing one can't corrupt the others
+        ready = wait([receiver for _, _, receiver, _ in running.values()], 0.1)
+        for name, (file, process, receiver, start) in list(running.items()):
+            elapsed = time.time() - start
+            if receiver in ready:
+                try:
+                    summaries[name] = receiver.recv()
+                except EOFError:  # the worker died before its summary
+                    summaries[name] = {"benchmark": name, "status": "crashed"}
+                    summaries[name]["time"] = elapsed
+            elif timeout is not None and elapsed > timeout + GRACE:
+                process.terminate()
+                summaries[name] = {"benchmark": name, "status": "killed"}
+                summaries[name]["time"] = elapsed
+            else:
+                continue
+            receiver.close()
+            process.join(GRACE)
+            if process.is_alive():  # stuck after its summary
+                process.terminate()
+                process.join()
+            del running[name]
+
+    result = [summaries[os.path.basename(file)] for file in files]
+    logging.info("summary:\n{}".format(format_summary(result)))
+    if any("phases" in summary for summary in result):
+        logging.info("phases:\n{}".format(format_phases(result)))
+    if summary_file:
+        with open(summary_file, "w") as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+def format_summary(summaries) -> str:
+    """
+    :param summaries: the summary of every benchmark
+    :return: the summaries as a table
+    """
+    rows = [COLUMNS]
+    for summary in summaries:
+        row = []
+        for column in COLUMNS:
+            val = summary.get(column)
+            if val is None:
+                row.append("-")
+            elif column == "pruned":
+                row.append("{:.6%}".format(val))
+            elif column == "time":
+                row.append("{:.2f}s".format(val))
+            else:
+                row.append(str(val))
+        rows.append(row)
+    return format_table(rows)
+
+
+def format_phases(summaries) -> str:
+    """
+    :param summaries: the summary of every benchmark, with the profiled phases
+    :return: the wall time, the peak memory and its growth of every phase as a
+    table
+    """
+    names = list(dict.fromkeys(n for s in summaries for n in s.get("phases", {})))
+    rows = [["benchmark"] + names]
+    for summary in summaries:
+        phases = summary.get("phases", {})
+        rows.append(
+            [summary["benchmark"]]
+            + [
+                (
+                    "{:.3f}s / {:.1f}M (+{:.1f}M)".format(
+                        phases[n]["time"],
+                        phases[n]["peak"] / (1 << 20),
+                        phases[n]["growth"] / (1 << 20),
+                    )
+                    if n in phases
+                    else "-"
+                )
+                for n in names
+            ]
+        )
+    return format_table(rows)
+
+
+def format_table(rows) -> str:
+    """
+    :param rows: the rows of the table, the first one is the header
+    :return: the rows with the columns aligned
+    """
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(val.ljust(width) for val, width in zip(row, widths)) for row in rows
+    )
@@ -0,0 +1,134 @@
+from model.state import BitsetPartitionState, PartitionState
+
+
+class LowerBound:
+    """
+    an admissible estimate of the cuts that are unavoidable for the cells
+    still unassigned, on top of the label of the current partial assignment
+    the base class estimates nothing, which disables the lookahead pruning
+    """
+
+    def estimate(self, state: PartitionState, cells, left_remain, right_remain):
+        """
+        :param state: the current partial assignment
+        :param cells: the cells still unassigned
+        :param left_remain: the number of empty spaces remaining in the left
+        :param right_remain: the number of empty space remaining in the right
+        :return: a lower bound of the nets that will be cut additionally
+        """
+        return 0
+
+
+class CapacityBound(LowerBound):
+    """
+    count the uncut nets that can't fit in the side they already use,
+    i.e. a net placed only in LEFT whose unassigned pins outnumber left_remain
+    must get a pin in RIGHT, and the other way around
+    """
+
+    def estimate(self, state: PartitionState, cells, left_remain, right_remain):
+        if isinstance(state, BitsetPartitionState):
+            return self._forced_mask(state, left_remain, right_remain).bit_count()
+        return len(self._forced_nets(state, left_remain, right_remain))
+
+    @staticmethod
+    def _forced_nets(state: PartitionState, left_remain, right_remain):
+        """
+        :return: the set of uncut nets forced to be cut by the remaining capacity
+        """
+        forced = set()
+        both = max(left_remain, right_remain)
+        for net, (left, right, free) in enumerate(
+            zip(state.left, state.right, state.free)
+        ):
+            if free == 0 or (left and right):
+                continue
+            if left:
+                if free > left_remain:
+                    forced.add(net)
+            elif right:
+                if free > right_remain:
+                    forced.add(net)
+            elif free > both:
+                forced.add(net)
+        return forced
+
+    @staticmethod
+    def _forced_mask(state: BitsetPartitionState, left_remain, right_remain):
+        """
+        :return: the mask of the uncut nets forced to be cut by the remaining capacity
+        """
+        left, right = state.left, state.right
+        left_above = state.free_above(left_remain)
+        right_above = (
+            left_above
+            if right_remain == left_remain
+            else state.free_above(right_remain)
+        )
+        both_above = right_above if right_remain > left_remain else left_above
+        return (
+            left & ~right & left_above
+            | right & ~left & right_above
+            | state.all & ~(left | right) & both_above
+        )
+
+
+class ForcedCutBound(CapacityBound):
+    """
+    on top of the capacity bound, an unassigned cell connected to nets placed
+    only in LEFT and to nets placed only in RIGHT cuts at least the smaller
+    group wherever it goes, cells are counted greedily on disjoint nets so
+    that no net is counted twice
+    """
+
+    def estimate(self, state: PartitionState, cells, left_remain, right_remain):
+        if isinstance(state, BitsetPartitionState):
+            return self.__estimate_masks(state, cells, left_remain, right_remain)
+
+        used = self._forced_nets(state, left_remain, right_remain)
+        bound = len(used)
+
+        left, right, cell_nets = state.left, state.right, state.cell_nets
+        for cid in cells:
+            left_nets, right_nets = [], []
+            for net in cell_nets[cid]:
+                if net in used:
+                    continue
+                if left[net]:
+                    if not right[net]:
+                        left_nets.append(net)
+                elif right[net]:
+                    right_nets.append(net)
+
+            if left_nets and right_nets:
+                bound += min(len(left_nets), len(right_nets))
+                used.update(left_nets)
+                used.update(right_nets)
+        return bound
+
+    def __estimate_masks(
+        self, state: BitsetPartitionState, cells, left_remain, right_remain
+    ):
+        """
+        the same estimate on the masks of a BitsetPartitionState
+        """
+        used = self._forced_mask(state, left_remain, right_remain)
+        bound = used.bit_count()
+
+        left_only = state.left & ~state.right
+        right_only = state.right & ~state.left
+        cell_nets = state.cell_nets
+        for cid in cells:
+            nets = cell_nets[cid] & ~used
+            left_nets, right_nets = nets & left_only, nets & right_only
+            if left_nets and right_nets:
+                bound += min(left_nets.bit_count(), right_nets.bit_count())
+                used |= left_nets | right_nets
+        return bound
+
+
+BOUNDS = {
+    "none": LowerBound,
+    "capacity": CapacityBound,
+    "forced": ForcedCutBound,
+}
@@ -0,0 +1,162 @@
+import logging
+import os
+import time
+from collections import Counter, deque
+
+from model.circuit import Circuit
+from model.netlist import Netlist
+from util.constants import LEFT, NOT_SET, RIGHT
+from util.result import read_result, write_result
+
+# the number of cells re-optimized around the changed nets by default
+WINDOW = 30
+
+
+def netlist_diff(old: Netlist, new: Netlist):
+    """
+    :param old: the netlist before the change
+    :param new: the netlist after the change, the cells keep their ids
+    :return: the nets of new that are not in old, and the pins of the nets of old
+    that are not in new, a net is identified by its set of pins
+    """
+    remaining = Counter(frozenset(old.get_pins(i)) for i in range(old.get_nets_size()))
+    added = []
+    for i in range(new.get_nets_size()):
+        pins = frozenset(new.get_pins(i))
+        if remaining[pins] > 0:
+            remaining[pins] -= 1
+        else:
+            added.append(i)
+    removed = [list(pins) for pins, count in remaining.items() for _ in range(count)]
+    return added, removed
+
+
+def affected_cells(old: Netlist, new: Netlist, window=WINDOW):
+    """
+    :param old: the netlist before the change
+    :param new: the netlist after the change
+    :param window: the number of cells to select, at least all cells of the diff
+    :return: the cells of the changed nets and the new cells, then their neighbours
+    in breadth first order, until there are window cells
+    """
+    added, removed = netlist_diff(old, new)
+    n: int = new.get_cells_size()
+    seeds = [cid for i in added for cid in new.get_pins(i)]
+    seeds += [cid for pins in removed for cid in pins if cid < n]
+    seeds += range(old.get_cells_size(), n)
+    logging.info(
+        "netlist diff: {} nets added, {} nets removed, {} cells added".format(
+            len(added), len(removed), max(0, n - old.get_cells_size())
+        )
+    )
+
+    selected = dict.fromkeys(seeds)
+    queue = deque(selected)
+    while queue and len(selected) < window:
+        for net in new.get_nets(queue.popleft()):
+            for cid in new.get_pins(net):
+                if cid not in selected and len(selected) < window:
+                    selected[cid] = None
+                    queue.append(cid)
+    return list(selected)
+
+
+class EcoPartitioner:
+    """
+    incremental re-partitioning after an engineering change order, the result of
+    the old netlist is kept for the cells away from the change, and only the
+    cells of the changed nets and their neighbours are re-optimized, exactly by
+    branch and bound, or heuristically by Fiduccia-Mattheyses with the other
+    cells locked
+    """
+
+    def __init__(self, old_file, old_result=None, solver=None, window=WINDOW):
+        """
+        :param old_file: the benchmark before the change
+        :param old_result: the output file of the old benchmark, the one in
+        outputs/ if None
+        :param solver: a Partitioner to re-optimize exactly, or an FMPartitioner
+        :param window: the number of cells to re-optimize, the cells of the diff
+        are always re-optimized
+        """
+        self.old_file = old_file
+        self.old_result = old_result
+        self.solver = solver
+        self.window = window
+        self.best = -1
+        self.result = []
+
+    def partition(self, circuit: Circuit):
+        """
+        re-partition the changed circuit, and write the result
+        :param circuit: the circuit after the change, or its netlist
+        :return: the label and the assignment
+        """
+        netlist: Netlist = circuit.get_netlist()
+        start = time.time()
+        self.solve(netlist)
+        logging.info(
+            "final result = {}, time = {:.3f}s".format(self.best, time.time() - start)
+        )
+        write_result(netlist.benchmark, self.best, self.result, netlist.digest())
+        return self.best, self.result
+
+    def solve(self, netlist: Netlist):
+        """
+        :param netlist: the netlist after the change
+        :return: the label and the assignment
+        """
+        old = Circuit()
+        old.parse_file(self.old_file)
+        old_netlist = old.get_netlist()
+        old_assigned = self.__old_assignment(old_netlist)
+
+        n: int = netlist.get_cells_size()
+        cells = affected_cells(old_netlist, netlist, self.window)
+        fixed = (old_assigned + [NOT_SET] * n)[:n]
+        for cid in cells:
+            fixed[cid] = NOT_SET
+
+        # fill the free cells by their old sides, as far as the capacities allow
+        start = list(fixed)
+        left = int(n / 2) - sum(1 for v in fixed if v == LEFT)
+        if not 0 <= left <= len(cells):
+            raise ValueError("the fixed cells exceed a side, increase the window")
+        free = sorted(  # LEFT first, then the new cells, then RIGHT
+            cells, key=lambda c: 1 - (old_assigned[c] if c < len(old_assigned) else 0)
+        )
+        for i, cid in enumerate(free):
+            start[cid] = LEFT if i < left else RIGHT
+        logging.info(
+            "re-optimizing {} of {} cells, start = {}".format(
+                len(cells), n, netlist.calculate_label(start)
+            )
+        )
+
+        if hasattr(self.solver, "refine"):  # heuristic, the other cells are locked
+            locked = [v != NOT_SET for v in fixed]
+            self.best, self.result = self.solver.refine(netlist, start, fixed=locked)
+        else:
+            self.best, self.result = self.solver.solve(netlist, fixed, start)
+        return self.best, self.result
+
+    def __old_assignment(self, old: Netlist):
+        """
+        :param old: the netlist before the change
+        :return: the old result, mirrored so that LEFT is the smaller side
+        """
+        file = self.old_result or "outputs/{}".format(os.path.basename(self.old_file))
+        result = read_result(file)
+        if result is None:
+            raise ValueError("no result of the old benchmark in {}".format(file))
+        label, assigned = result
+        if (
+            len(assigned) != old.get_cells_size()
+            or any(v != LEFT and v != RIGHT for v in assigned)
+            or old.calculate_label(assigned) != label
+        ):
+            raise ValueError("{} is not a bisection of {}".format(file, self.old_file))
+        if sum(1 for v in assigned if v == LEFT) > len(assigned) / 2:
+            assigned = [-v for v in assigned]
+        logging.info("old result = {}".format(label))
+        return assigned
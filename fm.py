@@ -0,0 +1,287 @@
+import logging
+import random
+import time
+
+from model.circuit import Circuit
+from model.netlist import Netlist
+from util.constants import LEFT, RIGHT, NOT_SET
+from util.profiling import phase
+from util.result import write_result
+
+
+class GainBuckets:
+    """
+    the bucket list of the free cells of one side, keyed by their gains,
+    a bucket is a doubly linked list threaded through the next / prev arrays
+    """
+
+    def __init__(self, cells: int, pmax: int) -> None:
+        """
+        :param cells: the number of cells
+        :param pmax: the maximum possible gain, i.e. the maximum degree of a cell
+        """
+        self.pmax = pmax
+        self.heads = [-1] * (2 * pmax + 1)
+        self.next = [-1] * cells
+        self.prev = [-1] * cells
+        self.top = -1  # the highest non-empty bucket, -1 if empty
+
+    def insert(self, cid, gain) -> None:
+        b = gain + self.pmax
+        head = self.heads[b]
+        self.next[cid], self.prev[cid] = head, -1
+        if head >= 0:
+            self.prev[head] = cid
+        self.heads[b] = cid
+        if b > self.top:
+            self.top = b
+
+    def remove(self, cid, gain) -> None:
+        b = gain + self.pmax
+        nxt, prv = self.next[cid], self.prev[cid]
+        if prv >= 0:
+            self.next[prv] = nxt
+        else:
+            self.heads[b] = nxt
+        if nxt >= 0:
+            self.prev[nxt] = prv
+        while self.top >= 0 and self.heads[self.top] < 0:
+            self.top -= 1
+
+    def peek(self):
+        """
+        :return: a cell with the highest gain and its gain, or None if empty
+        """
+        if self.top < 0:
+            return None
+        return self.heads[self.top], self.top - self.pmax
+
+
+class FMPartitioner:
+    """
+    Fiduccia-Mattheyses partitioning, cells are moved one at a time in order of
+    their gain and locked, every pass rolls back to its best balanced prefix
+    """
+
+    def __init__(self, starts=10, passes=None, tolerance=1):
+        """
+        :param starts: the number of random initial partitions
+        :param passes: the maximum number of passes per start, None to run until
+        a pass brings no improvement
+        :param tolerance: the number of cells a side may exceed its capacity by
+        in the middle of a pass
+        """
+        self.starts = starts
+        self.passes = passes
+        self.tolerance = tolerance
+        self.best = -1
+        self.result = []
+
+    def partition(self, circuit: Circuit):
+        """
+        execute the Fiduccia-Mattheyses partitioning
+        :param circuit: the circuit, or its netlist
+        :return: the best label and assignment
+        """
+        netlist: Netlist = circuit.get_netlist()
+        with phase("search"):
+            self.best, self.result = self.solve(netlist)
+
+        logging.info("final result = {}".format(self.best))
+
+        write_result(netlist.benchmark, self.best, self.result, netlist.digest())
+
+        return self.best, self.result
+
+    def solve(self, netlist: Netlist, deadline=None, weights=None):
+        """
+        :param netlist:
+        :param deadline: the time after which no more starts or passes are run,
+        the first start still runs its rebalancing pass, None for no limit
+        :param weights: the weight of every cell, 1 for all cells if None
+        :return: the best label and assignment over all starts, with the lighter
+        half in LEFT, i.e. floor(n / 2) cells for unit weights
+        """
+        best, result = -1, []
+        for i in range(self.starts):
+            label, assigned = self.refine(
+                netlist, self.__random_assignment(netlist), weights, deadline=deadline
+            )
+            logging.debug("fm start {}: label = {}".format(i, label))
+            if best < 0 or label < best:
+                best, result = label, assigned
+            if deadline is not None and time.time() >= deadline:
+                break
+        return best, result
+
+    def refine(
+        self, netlist: Netlist, assigned, weights=None, fixed=None, deadline=None
+    ):
+        """
+        improve an assignment with passes of Fiduccia-Mattheyses moves, an
+        unbalanced assignment is rebalanced by the first pass
+        :param netlist:
+        :param assigned: the initial assignment, it is modified in place
+        :param weights: the weight of every cell, 1 for all cells if None
+        :param fixed: whether every cell keeps its side, None if all cells move
+        :param deadline: the time after which no more passes are run once the
+        assignment is balanced, None for no limit
+        :return: the label and the improved assignment, with the lighter half in
+        LEFT, i.e. floor(n / 2) cells for unit weights, unless cells are fixed
+        """
+        n: int = netlist.get_cells_size()
+        if weights is None:
+            weights = [1] * n
+        total = sum(weights)
+
+        low, high = self.__balance(weights)
+
+        label = netlist.calculate_label(assigned)
+        passes = 0
+        while self.passes is None or passes < self.passes:
+            passes += 1
+            before = low <= self.__left_weight(assigned, weights) <= high
+            gain = self.__pass(netlist, assigned, weights, fixed)
+            label -= gain
+            logging.debug("fm pass {}: label = {}".format(passes, label))
+            after = low <= self.__left_weight(assigned, weights) <= high
+            if gain <= 0 and (before or not after):  # no gain, and no rebalance
+                break
+            if after and deadline is not None and time.time() >= deadline:
+                break
+
+        if fixed is None and self.__left_weight(assigned, weights) > int(total / 2):
+            assigned = [-v for v in assigned]  # mirror into the search capacities
+        return label, assigned
+
+    @staticmethod
+    def __left_weight(assigned, weights):
+        return sum(w for v, w in zip(assigned, weights) if v == LEFT)
+
+    @staticmethod
+    def __balance(weights):
+        """
+        :param weights: the weight of every cell
+        :return: the range of the weight of LEFT that is as close to half of the
+        weight as the cells allow, i.e. floor(n / 2) to ceil(n / 2) for unit weights
+        """
+        total, slack = sum(weights), int(max(weights, default=1) / 2)
+        return int(total / 2) - slack, total - int(total / 2) + slack
+
+    def __pass(self, netlist: Netlist, assigned, weights, fixed=None):
+        """
+        execute one pass, every cell is moved at most once, then the moves after
+        the best balanced prefix are rolled back
+        :param netlist:
+        :param assigned: the current assignment, updated in place
+        :param weights: the weight of every cell
+        :param fixed: whether every cell keeps its side, the fixed cells start locked
+        :return: the decrease of the label
+        """
+        n, nets = netlist.get_cells_size(), netlist.get_nets_size()
+        net_offsets, net_pins = netlist.net_offsets, netlist.net_pins
+        cell_nets = [netlist.get_nets(i) for i in range(n)]
+
+        count = {LEFT: [0] * nets, RIGHT: [0] * nets}
+        for net in range(nets):
+            for k in range(net_offsets[net], net_offsets[net + 1]):
+                count[assigned[net_pins[k]]][net] += 1
+
+        gains = [0] * n
+        for cid in range(n):
+            same, other = count[assigned[cid]], count[-assigned[cid]]
+            for net in cell_nets[cid]:
+                if same[net] == 1:
+                    gains[cid] += 1
+                if other[net] == 0:
+                    gains[cid] -= 1
+
+        locked = [False] * n if fixed is None else list(fixed)
+        pmax = max((len(nets) for nets in cell_nets), default=0)
+        buckets = {LEFT: GainBuckets(n, pmax), RIGHT: GainBuckets(n, pmax)}
+        for cid in range(n):
+            if not locked[cid]:
+                buckets[assigned[cid]].insert(cid, gains[cid])
+
+        def update(cid, delta):
+            if not locked[cid]:
+                buckets[assigned[cid]].remove(cid, gains[cid])
+                gains[cid] += delta
+                buckets[assigned[cid]].insert(cid, gains[cid])
+
+        # a side may exceed half of the weight by tolerance cells in the middle of
+        # a pass, an unbalanced assignment may only move towards the balance
+        total = sum(weights)
+        margin = self.tolerance * max(weights, default=1)
+        low, high = int(total / 2) - margin, total - int(total / 2) + margin
+
+        def distance(w):
+            return max(low - w, w - high, 0)
+
+        balance_low, balance_high = self.__balance(weights)
+        left = self.__left_weight(assigned, weights)
+
+        moves, total_gain = [], 0
+        best, best_moves = (0, 0) if balance_low <= left <= balance_high else (None, 0)
+        for _ in range(n):
+            candidates = []
+            for side, sign in ((LEFT, -1), (RIGHT, 1)):
+                top = buckets[side].peek()
+                if top is not None:
+                    moved = left + sign * weights[top[0]]
+                    if distance(moved) == 0 or distance(moved) < distance(left):
+                        candidates.append(top)
+            if not candidates:
+                break
+
+            cid, gain = max(candidates, key=lambda c: c[1])
+            src = assigned[cid]
+            dst = -src
+            buckets[src].remove(cid, gain)
+            locked[cid] = True
+
+            for net in cell_nets[cid]:
+                pins = net_pins[net_offsets[net] : net_offsets[net + 1]]
+                frm, to = count[src], count[dst]
+                if to[net] == 0:
+                    for other in pins:
+                        update(other, 1)
+                elif to[net] == 1:
+                    for other in pins:
+                        if assigned[other] == dst:
+                            update(other, -1)
+                frm[net] -= 1
+                to[net] += 1
+                if frm[net] == 0:
+                    for other in pins:
+                        update(other, -1)
+                elif frm[net] == 1:
+                    for other in pins:
+                        if other != cid and assigned[other] == src:
+                            update(other, 1)
+
+            assigned[cid] = dst
+            left += weights[cid] if dst == LEFT else -weights[cid]
+            total_gain += gain
+            moves.append(cid)
+
+            if balance_low <= left <= balance_high and (
+                best is None or total_gain > best
+            ):
+                best, best_moves = total_gain, len(moves)
+
+        for cid in moves[best_moves:]:  # roll back to the best prefix
+            assigned[cid] = -assigned[cid]
+        return 0 if best is None else best
+
+    @staticmethod
+    def __random_assignment(netlist: Netlist):
+        """
+        :param netlist:
+        :return: a random assignment with floor(n / 2) cells in LEFT
+        """
+        n: int = netlist.get_cells_size()
+        assigned = [NOT_SET] * n
+        for i, v in enumerate(random.sample(range(n), n)):
+            assigned[v] = LEFT if i < int(n / 2) else RIGHT
+        return assigned
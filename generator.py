@@ -0,0 +1,129 @@
+import argparse
+import random
+
+# the distribution of the number of pins of a net, most nets are small
+DEGREES = (2, 2, 2, 2, 3, 3, 4, 5)
+
+
+def planted_netlist(cells, nets=None, cross=None, window=50, seed=0):
+    """
+    a netlist with a planted bisection, the cells are split into two halves, every
+    net connects cells close to each other in the same half, except cross nets,
+    which connect both halves
+    :param cells: the number of cells
+    :param nets: the number of nets, as many as the cells if None
+    :param cross: the number of nets across the halves, about 1% of the nets if None
+    :param window: the maximum distance between the cells of a net in a half
+    :param seed: the seed of the random generator
+    :return: the nets, each a list of cells with the source first, and the cut of
+    the planted bisection, an upper bound of the optimal cut
+    """
+    rng = random.Random(seed)
+    nets = cells if nets is None else nets
+    cross = max(1, nets // 100) if cross is None else cross
+    half = cells // 2
+    if half < 2:
+        raise ValueError("a planted netlist needs at least 4 cells")
+
+    result = []
+    for i in range(nets):
+        k = min(rng.choice(DEGREES), half)
+        if i < cross:  # one pin on the other side
+            left, right = rng.randrange(half), half + rng.randrange(cells - half)
+            others = [rng.randrange(half) for _ in range(k - 2)]
+            pins = [left, right] + others
+        else:
+            lo, size = (0, half) if rng.random() < 0.5 else (half, cells - half)
+            source = lo + rng.randrange(size)
+            pins = [source] + [
+                lo + (source - lo + rng.randint(1, window)) % size for _ in range(k - 1)
+            ]
+        result.append(list(dict.fromkeys(pins)))
+    rng.shuffle(result)
+    return _relabel(cells, result, rng), cross
+
+
+def rent_netlist(cells, terminals=3.0, exponent=0.6, seed=0):
+    """
+    a hierarchical netlist that follows Rent's rule, blocks are split recursively,
+    a block of s cells gets about terminals * s ^ exponent / 2 nets across its two
+    halves, so the number of nets leaving a block grows as s ^ exponent
+    :param cells: the number of cells
+    :param terminals: the average number of pins of a cell
+    :param exponent: the Rent exponent, between 0 and 1
+    :param seed: the seed of the random generator
+    :return: the nets, each a list of cells with the source first, and the cut of
+    the top level split, an upper bound of the optimal cut
+    """
+    rng = random.Random(seed)
+    if cells < 2:
+        raise ValueError("a rent netlist needs at least 2 cells")
+
+    result, planted = [], 0
+    blocks = [(0, cells)]
+    while blocks:
+        lo, hi = blocks.pop()
+        size = hi - lo
+        if size < 2:
+            continue
+        mid = lo + size // 2
+        count = max(1, round(terminals * size**exponent / 2))
+        for _ in range(count):
+            k = min(rng.choice(DEGREES), size)
+            pins = [rng.randrange(lo, mid), rng.randrange(mid, hi)]
+            pins += [rng.randrange(lo, hi) for _ in range(k - 2)]
+            result.append(list(dict.fromkeys(pins)))
+        if size == cells:
+            planted = count
+        blocks += [(lo, mid), (mid, hi)]
+    rng.shuffle(result)
+    return _relabel(cells, result, rng), planted
+
+
+def _relabel(cells, nets, rng):
+    """
+    :return: the nets with the cells shuffled, so that the file order of the cells
+    gives no hint of the structure
+    """
+    perm = list(range(cells))
+    rng.shuffle(perm)
+    return [[perm[cid] for cid in pins] for pins in nets]
+
+
+def write_netlist(file, cells, nets):
+    """
+    write the netlist in the benchmark format, readable by Circuit.parse_file
+    :param file: the output file
+    :param cells: the number of cells
+    :param nets: the nets, each a list of cells with the source first
+    """
+    with open(file, "w") as f:
+        f.write("{} {}\n".format(cells, len(nets)))
+        for pins in nets:
+            f.write("{} {}\n".format(len(pins), " ".join(map(str, pins))))
+
+
+GENERATORS = {
+    "planted": planted_netlist,
+    "rent": rent_netlist,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="generate a synthetic netlist in the benchmark format"
+    )
+    parser.add_argument("cells", help="the number of cells", type=int)
+    parser.add_argument("outfile", help="the output file")
+    parser.add_argument(
+        "--generator",
+        help="the structure of the netlist (default: planted)",
+        choices=GENERATORS.keys(),
+        default="planted",
+    )
+    parser.add_argument("--seed", help="the random seed", type=int, default=0)
+    args = parser.parse_args()
+
+    nets, planted = GENERATORS[args.generator](args.cells, seed=args.seed)
+    write_netlist(args.outfile, args.cells, nets)
+    print("{} cells, {} nets, planted cut = {}".format(args.cells, len(nets), planted))
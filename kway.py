@@ -0,0 +1,146 @@
+import logging
+from multiprocessing import Pool
+
+from model.circuit import Circuit
+from model.netlist import Netlist
+from partitioning import Partitioner
+from util.constants import LEFT
+from util.result import write_result
+
+# the bisector of a worker process
+_bisector = None
+
+
+def _init_worker(bisector):
+    global _bisector
+    _bisector = bisector
+
+
+def _bisect(netlist: Netlist):
+    return _bisector.solve(netlist)
+
+
+def sub_netlists(netlist: Netlist, parts):
+    """
+    :param netlist:
+    :param parts: the cells of every sub-circuit, disjoint
+    :return: the netlist induced by every sub-circuit, with the nets that have
+    all their pins in it, a net with pins in several sub-circuits is already cut,
+    so it doesn't matter how they are split
+    """
+    part_of, index = {}, {}
+    for p, cells in enumerate(parts):
+        for i, cid in enumerate(cells):
+            part_of[cid], index[cid] = p, i
+
+    nets = [[] for _ in parts]
+    for i in range(netlist.get_nets_size()):
+        pins = netlist.get_pins(i)
+        p = part_of.get(pins[0]) if len(pins) > 1 else None
+        if p is not None and all(part_of.get(cid) == p for cid in pins):
+            nets[p].append([index[cid] for cid in pins])
+    return [
+        Netlist.from_nets(len(cells), part_nets, netlist.benchmark)
+        for cells, part_nets in zip(parts, nets)
+    ]
+
+
+def calculate_kway_label(netlist: Netlist, parts):
+    """
+    :param netlist:
+    :param parts: the partition of every cell
+    :return: the number of nets with pins in more than one partition
+    """
+    return sum(
+        1
+        for i in range(netlist.get_nets_size())
+        if len({parts[cid] for cid in netlist.get_pins(i)}) > 1
+    )
+
+
+class KWayPartitioner:
+    """
+    k-way partitioning by recursive bisection, every partition of a level is
+    bisected independently, so the bisections of a level run in a process pool,
+    k must be a power of two, and the sizes of the partitions differ by at most one
+    """
+
+    def __init__(self, k=4, bisector=None, jobs=1):
+        """
+        :param k: the number of partitions, a power of two
+        :param bisector: the partitioner of every bisection, with a solve method
+        :param jobs: the number of processes bisecting the partitions of a level,
+        the bisector itself should then use a single process
+        """
+        if k < 2 or k & (k - 1):
+            raise ValueError("k must be a power of two, got {}".format(k))
+        self.k = k
+        self.bisector = Partitioner() if bisector is None else bisector
+        self.jobs = jobs
+        self.best = -1
+        self.result = []
+
+    def partition(self, circuit: Circuit):
+        """
+        execute the k-way partitioning, and write the result, with the index of
+        the partition of every cell instead of LEFT / RIGHT, into
+        outputs/benchmark.kK, so it doesn't replace the bisection of the benchmark
+        :param circuit: the circuit, or its netlist
+        :return: the total label and the partition of every cell
+        """
+        netlist: Netlist = circuit.get_netlist()
+        self.solve(netlist)
+
+        sizes = [0] * self.k
+        for part in self.result:
+            sizes[part] += 1
+        logging.info("final result = {}, partition sizes = {}".format(self.best, sizes))
+
+        write_result(
+            "{}.k{}".format(netlist.benchmark, self.k),
+            self.best,
+            self.result,
+            netlist.digest(),
+            parts=self.k,
+        )
+
+        return self.best, self.result
+
+    def solve(self, netlist: Netlist):
+        """
+        :param netlist:
+        :return: the total label and the partition of every cell, 0 to k - 1
+        """
+        parts = [list(range(netlist.get_cells_size()))]  # the cells of every part
+        pool = (
+            Pool(self.jobs, _init_worker, (self.bisector,)) if self.jobs > 1 else None
+        )
+        try:
+            while len(parts) < self.k:
+                subs = sub_netlists(netlist, parts)
+                if pool is None:
+                    results = [self.bisector.solve(sub) for sub in subs]
+                else:
+                    results = pool.map(_bisect, subs)
+
+                halves = []
+                for cells, (label, assigned) in zip(parts, results):
+                    logging.info(
+                        "bisected {} cells of level {}: label = {}".format(
+                            len(cells), len(parts).bit_length() - 1, label
+                        )
+                    )
+                    halves.append([c for c, v in zip(cells, assigned) if v == LEFT])
+                    halves.append([c for c, v in zip(cells, assigned) if v != LEFT])
+                parts = halves
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.result = [0] * netlist.get_cells_size()
+        for i, cells in enumerate(parts):
+            for cid in cells:
+                self.result[cid] = i
+        self.best = calculate_kway_label(netlist, self.result)
+        return self.best, self.result
@@ -1,6 +1,10 @@
 import argparse
 
 from app import App
+from bounds import BOUNDS
+from model.state import STATES
+from multilevel import MATCHINGS
+from ordering import ORDERS
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -42,6 +46,239 @@ if __name__ == "__main__":
         action="store_true",
     )
 
+    parser.add_argument(
+        "-b",
+        "--bound",
+        help="the lower bound used for lookahead pruning (default: forced)",
+        choices=BOUNDS.keys(),
+        default="forced",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--order",
+        help="the order in which the search assigns the cells (default: cluster)",
+        choices=ORDERS.keys(),
+        default="cluster",
+    )
+
+    parser.add_argument(
+        "--state",
+        help="""
+        the partial assignment of the branch and bound search,
+        per-net pin counters (counters) or masks of the nets (bitset)
+        (default: bitset)
+        """,
+        choices=STATES.keys(),
+        default="bitset",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="the number of processes used by the branch and bound search",
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--algo",
+        help="""
+        the partitioning algorithm, branch and bound (bnb),
+        Fiduccia-Mattheyses (fm), multilevel or simulated annealing (sa)
+        (default: bnb)
+        """,
+        choices=["bnb", "fm", "multilevel", "sa"],
+        default="bnb",
+    )
+
+    parser.add_argument(
+        "-k",
+        "--kway",
+        help="""
+        the number of partitions, a power of two, more than 2 partitions are
+        made by recursive bisection with the selected algorithm (default: 2)
+        """,
+        type=int,
+        default=2,
+    )
+
+    parser.add_argument(
+        "--init",
+        help="""
+        the initial incumbent of the branch and bound search,
+        random partitioning or Fiduccia-Mattheyses (default: fm)
+        """,
+        choices=["random", "fm"],
+        default="fm",
+    )
+
+    parser.add_argument(
+        "--matching",
+        help="""
+        the matching used to coarsen the levels of multilevel partitioning
+        (default: heavy-edge)
+        """,
+        choices=MATCHINGS.keys(),
+        default="heavy-edge",
+    )
+
+    parser.add_argument(
+        "--coarsest",
+        help="""
+        the number of cells at which multilevel coarsening stops,
+        this level is partitioned by branch and bound (default: 20)
+        """,
+        type=int,
+        default=20,
+    )
+
+    parser.add_argument(
+        "--window",
+        help="""
+        refine the result of the algorithm by windows of WINDOW cells of the
+        cut nets, each searched by branch and bound with the other cells fixed,
+        the independent windows run on JOBS processes
+        """,
+        type=int,
+    )
+
+    parser.add_argument(
+        "--eco",
+        help="""
+        re-partition INFILE incrementally after a change of the benchmark ECO,
+        from the result of ECO, only the cells around the changed nets move,
+        by branch and bound with --algo bnb, by FM otherwise
+        """,
+    )
+
+    parser.add_argument(
+        "--eco-result",
+        help="the output file of the benchmark ECO (default: in outputs)",
+    )
+
+    parser.add_argument(
+        "--eco-window",
+        help="""
+        the number of cells re-optimized by --eco, the cells of the changed
+        nets and their neighbours (default: 30)
+        """,
+        type=int,
+        default=30,
+    )
+
+    parser.add_argument(
+        "--time-limit",
+        help="""
+        stop the branch and bound search after TIME_LIMIT seconds,
+        with the best result so far and its gap to the proven lower bound,
+        or the runs of simulated annealing
+        """,
+        type=float,
+    )
+
+    parser.add_argument(
+        "--sa-restarts",
+        help="""
+        the number of simulated annealing runs from random bisections,
+        they run on JOBS processes (default: 4)
+        """,
+        type=int,
+        default=4,
+    )
+
+    parser.add_argument(
+        "--sa-cooling",
+        help="the factor of the temperature after every step (default: 0.95)",
+        type=float,
+        default=0.95,
+    )
+
+    parser.add_argument(
+        "--sa-iterations",
+        help="the maximum number of moves tried by a simulated annealing run",
+        type=int,
+    )
+
+    parser.add_argument(
+        "--sa-seed",
+        help="the seed of the first simulated annealing run (default: 0)",
+        type=int,
+        default=0,
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        help="""
+        save the branch and bound search into CHECKPOINT when it stops early,
+        and resume it from there on the next run
+        """,
+    )
+
+    parser.add_argument(
+        "--warm-start",
+        help="""
+        start the branch and bound search from the previous result in outputs,
+        if it was written for the same netlist, and skip the search if that
+        result is proven optimal
+        """,
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--report-interval",
+        help="the number of seconds between two progress reports of the search",
+        type=float,
+        default=10,
+    )
+
+    parser.add_argument(
+        "--trace",
+        help="append every improvement of the best label to TRACE, as json lines",
+    )
+
+    parser.add_argument(
+        "--profile",
+        help="""
+        record the wall time and the peak memory of every phase of a run:
+        parse, seed, order, search and output
+        """,
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--profile-dump",
+        help="with --profile, save the cProfile stats of the search into PROFILE_DUMP",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        help="parse the benchmarks without the cache of parsed netlists in .cache",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--workers",
+        help="the number of benchmarks partitioned at the same time by --all",
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--timeout",
+        help="""
+        stop every benchmark of --all after TIMEOUT seconds with its best result,
+        and kill it if it doesn't stop soon after
+        """,
+        type=float,
+    )
+
+    parser.add_argument(
+        "--summary",
+        help="the json file the summary of --all is saved into",
+        default="outputs/summary.json",
+    )
+
     args = parser.parse_args()
 
     App(args)
@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from model.netlist import Netlist
+from model.parser import parse_netlist
+
+CACHE_DIR = ".cache"
+# the total size of the cache in bytes, the least recently used entries are evicted
+CACHE_LIMIT = 256 << 20
+
+# the version of the layout, bump it when the layout or the parser changes
+MAGIC = b"NLC1"
+# magic, byte order, sha256 of the benchmark, crc32 of the arrays, cells, and the
+# length of each of the arrays of the netlist
+HEADER = struct.Struct("<4s1s32sIi5q")
+
+
+def load_netlist(file, cache_dir=CACHE_DIR, limit=CACHE_LIMIT) -> Netlist:
+    """
+    load the netlist of a benchmark from the cache, keyed by the sha256 of the
+    content of the benchmark, parse and cache it on a miss
+    :param file: the benchmark file
+    :param cache_dir: the directory of the cache
+    :param limit: the maximum size of the cache in bytes
+    :return: the netlist
+    """
+    with open(file, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).digest()
+    # the extension selects the parser, so it is part of the key
+    key = "{}{}".format(digest.hex(), os.path.splitext(file)[1].lower())
+    path = os.path.join(cache_dir, key)
+
+    netlist = _read_entry(path, digest, os.path.basename(file))
+    if netlist is not None:
+        os.utime(path)  # the modification time orders the entries for eviction
+        logging.debug("loaded {} from the cache".format(file))
+        return netlist
+
+    netlist = parse_netlist(file, data)
+    try:
+        _write_entry(cache_dir, path, digest, netlist)
+        _evict(cache_dir, limit)
+    except OSError as e:  # a read-only or full disk only loses the cache
+        logging.warning("cannot cache {}: {}".format(file, e))
+    return netlist
+
+
+def _read_entry(path, digest, benchmark):
+    """
+    :return: the netlist in the entry, or None if it is missing, stale or corrupt
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            body = f.read()
+    except OSError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+
+    magic, order, entry_digest, crc, cells, *lengths = HEADER.unpack(header)
+    itemsize = array("i").itemsize
+    if (
+        magic != MAGIC
+        or order != sys.byteorder[:1].encode()
+        or entry_digest != digest
+        or len(body) != sum(lengths) * itemsize
+        or zlib.crc32(body) != crc
+    ):
+        return None
+
+    arrays, pos = [], 0
+    for length in lengths:
+        arr = array("i")
+        arr.frombytes(body[pos : pos + length * itemsize])
+        arrays.append(arr)
+        pos += length * itemsize
+    return Netlist.from_arrays(cells, arrays, benchmark)
+
+
+def _write_entry(cache_dir, path, digest, netlist: Netlist):
+    """
+    write the arrays of the netlist into the entry atomically
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    arrays = netlist.get_arrays()
+    body = b"".join(arr.tobytes() for arr in arrays)
+    header = HEADER.pack(
+        MAGIC,
+        sys.byteorder[:1].encode(),
+        digest,
+        zlib.crc32(body),
+        netlist.get_cells_size(),
+        *(len(arr) for arr in arrays)
+    )
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def _evict(cache_dir, limit):
+    """
+    remove the least recently used entries until the cache fits into the limit
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:  # removed by another process
+            pass
+        total -= size
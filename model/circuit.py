@@ -1,77 +1,75 @@
-import os
 from typing import List
 
 from model.cell import Cell
+from model.cache import load_netlist
 from model.net import Net
-from util.colors import random_colors
+from model.netlist import Netlist
+from model.parser import read_netlist
+from util.profiling import phase
 
 
 class Circuit:
-    def __init__(self) -> None:
+    def __init__(self, cache_dir=None) -> None:
+        """
+        :param cache_dir: the directory of the cache of parsed netlists, None for
+        no cache
+        """
+        self.cache_dir = cache_dir
         self.__cells: List[Cell] = []
         self.__nets: List[Net] = []
+        self.__netlist: Netlist = Netlist.from_nets(0, [])
         self.benchmark = None
 
     def calculate_label(self, assigned):
-        return sum([net.calculate_label(assigned) for net in self.__nets])
+        return self.__netlist.calculate_label(assigned)
 
     def parse_file(self, file) -> None:
         """
-        parse the input file
-        :param file: the input file
+        parse the input file into the netlist, the cell and net objects of the GUI
+        are only created when they are first used
+        :param file: the input file, in the benchmark format or hMETIS .hgr
         """
-        self.benchmark = os.path.basename(file)
-
-        with open(file, "r") as f:
-            first = f.readline().strip().split()
-
-            self.__init_cells(int(first[0]))
-            self.__init_circuit(int(first[1]), f)
-
-    def __init_cells(self, cells) -> None:
+        with phase("parse"):
+            if self.cache_dir is None:
+                self.__netlist = read_netlist(file)
+            else:
+                self.__netlist = load_netlist(file, self.cache_dir)
+        self.benchmark = self.__netlist.benchmark
+        self.__cells, self.__nets = [], []
+
+    def __init_circuit(self) -> None:
         """
-        initialized the cell list
-        :param cells: the number of cells to be palaced
+        create the cell and net objects from the netlist, if not created yet
         """
-        self.__cells = [Cell(i) for i in range(cells)]
+        if len(self.__cells) == self.__netlist.get_cells_size():
+            return
 
-    def __init_circuit(self, connections, f) -> None:
-        """
-        initialize the netslist
-        :param connections: the number of connections / nets
-        :param f: the input file
-        """
+        self.__cells = [Cell(i) for i in range(self.__netlist.get_cells_size())]
         self.__nets = []
-        colors = random_colors(connections)
-
-        for i in range(connections):
-            self.__read_net(colors[i % len(colors)], f.readline())
-
-    def __read_net(self, color, s) -> None:
+        for i in range(self.__netlist.get_nets_size()):
+            net: Net = Net(i)
+            for cid in self.__netlist.get_pins(i):
+                cell: Cell = self.__cells[cid]
+                cell.add_net(net)
+                net.add_cell(cell)
+            self.__nets.append(net)
+
+    def get_netlist(self) -> Netlist:
         """
-        create a net, based on the data, assign an unique color
-        then add to netlist
-        :param color: unique color for the net
-        :param s: string contains data of a net
+        :return: the frozen array-backed netlist of the circuit
         """
-        data = s.strip().split()
-
-        net: Net = Net(len(self.__nets), color)
-        for i in data[1:]:
-            cell: Cell = self.__cells[int(i)]
-            cell.add_net(net)
-            net.add_cell(cell)
-
-        self.__nets.append(net)
+        return self.__netlist
 
     def get_net(self, i: int) -> Net:
+        self.__init_circuit()
         return self.__nets[i]
 
     def get_cell(self, i: int) -> Cell:
+        self.__init_circuit()
         return self.__cells[i]
 
     def get_nets_size(self) -> int:
-        return len(self.__nets)
+        return self.__netlist.get_nets_size()
 
     def get_cells_size(self) -> int:
-        return len(self.__cells)
+        return self.__netlist.get_cells_size()
@@ -1,18 +1,31 @@
 from typing import List
 
 from model.cell import Cell
+from util.colors import net_color
 from util.constants import NOT_SET
 
 
 class Net:
-    def __init__(self, nid, color) -> None:
+    def __init__(self, nid) -> None:
         self.net_id = nid
         self.__cells: List[Cell] = []
-        self.color = color
+
+    @property
+    def color(self) -> str:
+        """
+        :return: the color of the net, only computed when the GUI draws it
+        """
+        return net_color(self.net_id)
 
     def add_cell(self, cell: Cell) -> None:
         self.__cells.append(cell)
 
+    def get_cells(self) -> List[Cell]:
+        """
+        :return: all cells of the net, the source first
+        """
+        return self.__cells
+
     def get_source(self) -> Cell:
         """
         :return: the source, which is the first cell in the cells
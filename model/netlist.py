@@ -0,0 +1,211 @@
+import hashlib
+from array import array
+
+from util.constants import LEFT, NOT_SET, RIGHT
+
+# the arrays of a netlist, in the order of Netlist.get_arrays
+ARRAYS = ("net_offsets", "net_pins", "sources", "cell_offsets", "cell_nets")
+
+
+class Netlist:
+    """
+    a frozen, array-backed view of a circuit in compressed sparse (CSR) form,
+    it carries only what the solvers need, none of the GUI fields
+
+    the pins of net i are net_pins[net_offsets[i]:net_offsets[i + 1]], source first
+    the nets of cell i are cell_nets[cell_offsets[i]:cell_offsets[i + 1]], once per pin
+    """
+
+    __slots__ = (
+        "benchmark",
+        "cells",
+        "nets",
+        "net_offsets",
+        "net_pins",
+        "sources",
+        "cell_offsets",
+        "cell_nets",
+    )
+
+    def __init__(self, cells: int, net_offsets, net_pins, benchmark=None) -> None:
+        """
+        :param cells: the number of cells
+        :param net_offsets: the offsets of each net in net_pins, one more than the nets
+        :param net_pins: the cells of every net, concatenated, the source first
+        :param benchmark: the name of the benchmark
+        """
+        net_offsets = array("i", net_offsets)
+        net_pins = array("i", net_pins)
+        nets = len(net_offsets) - 1
+
+        sources = array(
+            "i",
+            (
+                net_pins[net_offsets[i]] if net_offsets[i] < net_offsets[i + 1] else -1
+                for i in range(nets)
+            ),
+        )
+
+        # count the pins of every cell, then bucket the nets by cell
+        cell_offsets = array("i", [0] * (cells + 1))
+        for cid in net_pins:
+            cell_offsets[cid + 1] += 1
+        for i in range(cells):
+            cell_offsets[i + 1] += cell_offsets[i]
+
+        cell_nets = array("i", [0] * len(net_pins))
+        fill = array("i", cell_offsets[:-1])
+        for i in range(nets):
+            for k in range(net_offsets[i], net_offsets[i + 1]):
+                cid = net_pins[k]
+                cell_nets[fill[cid]] = i
+                fill[cid] += 1
+
+        self.__set(
+            benchmark, cells, (net_offsets, net_pins, sources, cell_offsets, cell_nets)
+        )
+
+    def __set(self, benchmark, cells, arrays):
+        """
+        set the fields of the frozen netlist
+        :param arrays: net_offsets, net_pins, sources, cell_offsets and cell_nets
+        """
+        object.__setattr__(self, "benchmark", benchmark)
+        object.__setattr__(self, "cells", cells)
+        object.__setattr__(self, "nets", len(arrays[0]) - 1)
+        for name, val in zip(ARRAYS, arrays):
+            object.__setattr__(self, name, val)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Netlist is frozen")
+
+    def __reduce__(self):
+        return Netlist, (self.cells, self.net_offsets, self.net_pins, self.benchmark)
+
+    @classmethod
+    def from_nets(cls, cells: int, nets, benchmark=None):
+        """
+        :param cells: the number of cells
+        :param nets: an iterable of nets, each one a sequence of cell ids, source first
+        :param benchmark: the name of the benchmark
+        :return: the netlist, a cell listed twice in a net is kept once
+        """
+        net_offsets, net_pins = array("i", [0]), array("i")
+        for pins in nets:
+            net_pins.extend(dict.fromkeys(pins))
+            net_offsets.append(len(net_pins))
+        return cls(cells, net_offsets, net_pins, benchmark)
+
+    @classmethod
+    def from_arrays(cls, cells: int, arrays, benchmark=None):
+        """
+        :param cells: the number of cells
+        :param arrays: net_offsets, net_pins, sources, cell_offsets and cell_nets
+        of a netlist, e.g. loaded from a cache, they are used as they are
+        :param benchmark: the name of the benchmark
+        :return: the netlist
+        """
+        netlist = cls.__new__(cls)
+        netlist.__set(benchmark, cells, arrays)
+        return netlist
+
+    def get_arrays(self):
+        """
+        :return: net_offsets, net_pins, sources, cell_offsets and cell_nets
+        """
+        return tuple(getattr(self, name) for name in ARRAYS)
+
+    def digest(self) -> str:
+        """
+        :return: the sha256 of the cells and the nets, it identifies the content of
+        the netlist regardless of the file it was read from
+        """
+        h = hashlib.sha256(str(self.cells).encode())
+        h.update(self.net_offsets.tobytes())
+        h.update(self.net_pins.tobytes())
+        return h.hexdigest()
+
+    def get_netlist(self):
+        """
+        :return: the netlist itself, so that solvers accept a Circuit or a Netlist
+        """
+        return self
+
+    def get_cells_size(self) -> int:
+        return self.cells
+
+    def get_nets_size(self) -> int:
+        return self.nets
+
+    def get_pins(self, i: int):
+        """
+        :param i: the net id
+        :return: the cells of the net, the source first
+        """
+        return self.net_pins[self.net_offsets[i] : self.net_offsets[i + 1]]
+
+    def get_nets(self, i: int):
+        """
+        :param i: the cell id
+        :return: the nets that include the cell, once per pin
+        """
+        return self.cell_nets[self.cell_offsets[i] : self.cell_offsets[i + 1]]
+
+    def calculate_label(self, assigned) -> int:
+        """
+        :param assigned: the assignment of every cell
+        :return: the number of nets with an assigned source and an assigned sink on
+        the other side
+        """
+        label = 0
+        offsets, pins, sources = self.net_offsets, self.net_pins, self.sources
+        for i in range(self.nets):
+            if sources[i] < 0:  # an empty net
+                continue
+            source = assigned[sources[i]]
+            if source == NOT_SET:
+                continue
+            for k in range(offsets[i] + 1, offsets[i + 1]):
+                v = assigned[pins[k]]
+                if v != NOT_SET and v != source:
+                    label += 1
+                    break
+        return label
+
+    def calculate_labels(self, assignments):
+        """
+        evaluate many assignments at once, the assignments are transposed into a
+        bitmask per cell with one bit per assignment, so every net is evaluated for
+        all of them by a few integer operations, and the cut nets are summed in
+        bit-sliced counters, bit j of the count of every assignment in planes[j]
+        :param assignments: a sequence of k assignments
+        :return: the labels of the k assignments
+        """
+        left, right = [0] * self.cells, [0] * self.cells
+        for row, assigned in enumerate(assignments):
+            bit = 1 << row
+            for cid, v in enumerate(assigned):
+                if v == LEFT:
+                    left[cid] |= bit
+                elif v == RIGHT:
+                    right[cid] |= bit
+
+        planes = []
+        offsets, pins = self.net_offsets, self.net_pins
+        for i in range(self.nets):
+            in_left, in_right = 0, 0
+            for k in range(offsets[i], offsets[i + 1]):
+                in_left |= left[pins[k]]
+                in_right |= right[pins[k]]
+            carry = in_left & in_right  # the assignments that cut net i
+            for j in range(len(planes)):
+                if not carry:
+                    break
+                planes[j], carry = planes[j] ^ carry, planes[j] & carry
+            if carry:
+                planes.append(carry)
+
+        return [
+            sum(((plane >> row) & 1) << j for j, plane in enumerate(planes))
+            for row in range(len(assignments))
+        ]
@@ -0,0 +1,91 @@
+import logging
+import os
+from array import array
+
+from model.netlist import Netlist
+
+
+def read_netlist(file) -> Netlist:
+    """
+    read a netlist file in one go, the format is chosen by the extension
+    .hgr: hMETIS hypergraph, anything else: the benchmark format of the course
+    :param file: the input file
+    :return: the netlist
+    """
+    with open(file, "rb") as f:
+        return parse_netlist(file, f.read())
+
+
+def parse_netlist(file, data: bytes) -> Netlist:
+    """
+    :param file: the input file, its extension selects the format
+    :param data: the content of the file
+    :return: the netlist
+    """
+    if os.path.splitext(file)[1].lower() == ".hgr":
+        cells, nets = _parse_hgr(data)
+    else:
+        cells, nets = _parse_txt(data)
+
+    error = "{}: a pin is not a cell of 0..{}".format(file, cells - 1)
+    try:
+        netlist = Netlist.from_nets(cells, nets, os.path.basename(file))
+    except IndexError:
+        raise ValueError(error)
+    if netlist.net_pins and min(netlist.net_pins) < 0:
+        raise ValueError(error)
+    return netlist
+
+
+def _parse_txt(data: bytes):
+    """
+    the benchmark format of the course, the first line holds the number of cells
+    and nets, then every net is its number of pins followed by its cells, the
+    source first, so the whole file is a single stream of integers
+    :param data: the content of the file
+    :return: the number of cells, and the cells of every net
+    """
+    tokens = array("i", map(int, data.split()))
+    if len(tokens) < 2:
+        raise ValueError("missing the number of cells and nets")
+    cells, nets = tokens[0], tokens[1]
+
+    result, pos = [], 2
+    for _ in range(nets):
+        if pos >= len(tokens):
+            raise ValueError("expected {} nets, found {}".format(nets, len(result)))
+        k = tokens[pos]
+        result.append(tokens[pos + 1 : pos + 1 + k])
+        pos += 1 + k
+    return cells, result
+
+
+def _parse_hgr(data: bytes):
+    """
+    the hMETIS hypergraph format, the first line holds the number of nets, the
+    number of cells and an optional fmt, then every line is a net, its cells are
+    numbered from 1, with fmt 1 or 11 the line starts with the weight of the net,
+    with fmt 10 or 11 the weights of the cells follow the nets, lines starting
+    with % are comments, the partitioners are unweighted, so weights are ignored
+    :param data: the content of the file
+    :return: the number of cells, and the cells of every net
+    """
+    lines = (line for line in data.splitlines() if not line.startswith(b"%"))
+    lines = (line for line in lines if line.strip())
+    header = next(lines, b"").split()
+    if len(header) < 2:
+        raise ValueError("missing the number of nets and cells")
+    nets, cells = int(header[0]), int(header[1])
+    fmt = header[2].decode() if len(header) > 2 else "0"
+    skip = 1 if fmt in ("1", "11") else 0
+    if fmt != "0":
+        logging.warning("hgr fmt {}: the weights are ignored".format(fmt))
+
+    result = []
+    for line in lines:
+        if len(result) == nets:
+            break  # the weights of the cells
+        result.append([int(pin) - 1 for pin in line.split()[skip:]])
+    if len(result) < nets:
+        raise ValueError("expected {} nets, found {}".format(nets, len(result)))
+    return cells, result
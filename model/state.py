@@ -0,0 +1,188 @@
+from model.netlist import Netlist
+from util.constants import LEFT, NOT_SET, RIGHT
+
+
+class PartitionState:
+    """
+    the assignment of a partial partition, with per-net pin counters that are
+    updated whenever a cell is assigned / unassigned
+    a net is cut once it has pins in both LEFT and RIGHT
+    """
+
+    def __init__(self, netlist: Netlist) -> None:
+        nets: int = netlist.get_nets_size()
+        offsets = netlist.net_offsets
+
+        self.netlist: Netlist = netlist
+        self.assigned = [NOT_SET] * netlist.get_cells_size()
+        self.left = [0] * nets
+        self.right = [0] * nets
+        self.free = [offsets[i + 1] - offsets[i] for i in range(nets)]
+        self.cell_nets = [netlist.get_nets(i) for i in range(netlist.get_cells_size())]
+
+    def assign(self, nid, value) -> int:
+        """
+        add the cell into LEFT / RIGHT, and update the pin counters of its nets
+        :param nid: the cell id
+        :param value: LEFT / RIGHT
+        :return: the number of nets that become cut after assigning the cell
+        """
+        self.assigned[nid] = value
+        if value == LEFT:
+            same, other = self.left, self.right
+        else:
+            same, other = self.right, self.left
+        free = self.free
+
+        delta = 0
+        for net in self.cell_nets[nid]:
+            if same[net] == 0 and other[net] > 0:
+                delta += 1
+            same[net] += 1
+            free[net] -= 1
+        return delta
+
+    def unassign(self, nid) -> None:
+        """
+        remove the cell from its partition, and restore the pin counters of its nets
+        :param nid: the cell id
+        """
+        same = self.left if self.assigned[nid] == LEFT else self.right
+        free = self.free
+        for net in self.cell_nets[nid]:
+            same[net] -= 1
+            free[net] += 1
+        self.assigned[nid] = NOT_SET
+
+    def snapshot(self):
+        """
+        :return: a copy of the assignment, read back by expand
+        """
+        return self.assigned.copy()
+
+    def expand(self, snapshot):
+        """
+        :param snapshot: a snapshot of the state
+        :return: the assignment of every cell
+        """
+        return snapshot
+
+
+class BitsetPartitionState:
+    """
+    the assignment of a partial partition as bitmasks over the nets, every cell
+    has the mask of its nets, so that assigning a cell is a few integer operations
+    whatever its degree, instead of a loop over its nets
+    left / right are the nets with a pin in LEFT / RIGHT, so the cut nets are
+    left & right, and the number of free pins of every net is kept in bit-sliced
+    counters, one mask per bit, so that the bounds can select the nets by their
+    free pins with masks too
+    the cells in LEFT / RIGHT are masks over the cells as well, so a snapshot of
+    the assignment is two integers instead of a copy of the list
+    the masks before every assignment are kept, cells must be unassigned in the
+    reverse order of their assignment, as the search does
+    """
+
+    def __init__(self, netlist: Netlist) -> None:
+        nets: int = netlist.get_nets_size()
+        offsets = netlist.net_offsets
+
+        self.netlist: Netlist = netlist
+        self.assigned = [NOT_SET] * netlist.get_cells_size()
+        self.all = (1 << nets) - 1
+        self.left = 0
+        self.right = 0
+        self.cells_left = 0
+        self.cells_right = 0
+        self.cell_nets = [
+            sum(1 << net for net in set(netlist.get_nets(i)))
+            for i in range(netlist.get_cells_size())
+        ]
+        sizes = [offsets[i + 1] - offsets[i] for i in range(nets)]
+        self.free = [
+            sum(1 << net for net, size in enumerate(sizes) if size >> b & 1)
+            for b in range(max(sizes, default=0).bit_length())
+        ]
+        # left, right, free, cells_left and cells_right before every assignment
+        self.__history = []
+
+    def assign(self, nid, value) -> int:
+        """
+        add the cell into LEFT / RIGHT, and update the masks of its nets
+        :param nid: the cell id
+        :param value: LEFT / RIGHT
+        :return: the number of nets that become cut after assigning the cell
+        """
+        self.assigned[nid] = value
+        left, right, free = self.left, self.right, self.free
+        self.__history.append((left, right, free, self.cells_left, self.cells_right))
+        nets = self.cell_nets[nid]
+        if value == LEFT:
+            self.left = left | nets
+            self.cells_left |= 1 << nid
+            cut = nets & right & ~left
+        else:
+            self.right = right | nets
+            self.cells_right |= 1 << nid
+            cut = nets & left & ~right
+
+        # subtract one from the free pins of the nets, with a borrow across the bits
+        borrow, planes = nets, []
+        for plane in free:
+            planes.append(plane ^ borrow)
+            borrow &= ~plane
+        self.free = planes
+        return cut.bit_count()
+
+    def unassign(self, nid) -> None:
+        """
+        remove the cell from its partition, the last one assigned
+        :param nid: the cell id
+        """
+        (
+            self.left,
+            self.right,
+            self.free,
+            self.cells_left,
+            self.cells_right,
+        ) = self.__history.pop()
+        self.assigned[nid] = NOT_SET
+
+    def snapshot(self):
+        """
+        :return: the masks of the cells in LEFT and RIGHT, read back by expand
+        """
+        return self.cells_left, self.cells_right
+
+    def expand(self, snapshot):
+        """
+        :param snapshot: a snapshot of the state
+        :return: the assignment of every cell
+        """
+        n = len(self.assigned)
+        left, right = (bin(mask)[:1:-1].ljust(n, "0") for mask in snapshot)
+        return [
+            LEFT if l == "1" else RIGHT if r == "1" else NOT_SET
+            for l, r in zip(left, right)
+        ]
+
+    def free_above(self, k):
+        """
+        :param k: a number of pins
+        :return: the mask of the nets with more than k free pins
+        """
+        above, equal = 0, self.all
+        for b in range(len(self.free) - 1, -1, -1):
+            plane = self.free[b]
+            if k >> b & 1:
+                equal &= plane
+            else:
+                above |= equal & plane
+                equal &= ~plane
+        return 0 if k >> len(self.free) else above
+
+
+STATES = {
+    "counters": PartitionState,
+    "bitset": BitsetPartitionState,
+}
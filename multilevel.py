@@ -0,0 +1,322 @@
+import logging
+import random
+import time
+from math import ceil
+
+from fm import FMPartitioner
+from model.circuit import Circuit
+from model.netlist import Netlist
+from partitioning import Partitioner
+from util.profiling import phase
+from util.result import write_result
+
+# nets with more pins than this are ignored when rating the neighbours of a cell
+LARGE_NET = 64
+# a strict matching merges a cell only with a neighbour rated at least this
+# fraction of its best one, settling for a weak neighbour when the strong ones
+# are taken merges cells across the natural cuts
+STRONG = 0.5
+
+
+def _ratings(netlist: Netlist, cid, accept, strict=False):
+    """
+    rate the neighbours of a cell by the nets they share, a net with p pins
+    contributes 1 / (p - 1)
+    :param netlist:
+    :param cid: the cell
+    :param accept: whether a neighbour may be merged with the cell
+    :param strict: keep only the neighbours rated at least STRONG times the best
+    neighbour, accepted or not
+    :return: the rating of every accepted neighbour
+    """
+    rating = {}
+    for net in netlist.get_nets(cid):
+        pins = netlist.get_pins(net)
+        if len(pins) < 2 or len(pins) > LARGE_NET:
+            continue
+        r = 1.0 / (len(pins) - 1)
+        for other in pins:
+            if other != cid:
+                rating[other] = rating.get(other, 0.0) + r
+    strong = STRONG * max(rating.values()) if strict and rating else 0.0
+    return {other: r for other, r in rating.items() if r >= strong and accept(other)}
+
+
+def heavy_edge_matching(netlist: Netlist, weights, limit, strict=False):
+    """
+    visit the cells in random order, and match every unmatched cell with its
+    unmatched neighbour of the highest rating
+    :param netlist:
+    :param weights: the weight of every cell
+    :param limit: the maximum weight of a coarse cell
+    :param strict: leave a cell unmatched if its strong neighbours are taken
+    :return: the coarse cell of every cell, and the number of coarse cells
+    """
+    n: int = netlist.get_cells_size()
+    clusters = [-1] * n
+    count = 0
+
+    for cid in random.sample(range(n), n):
+        if clusters[cid] >= 0:
+            continue
+        rating = _ratings(
+            netlist,
+            cid,
+            lambda other: clusters[other] < 0
+            and weights[cid] + weights[other] <= limit,
+            strict,
+        )
+        clusters[cid] = count
+        if rating:
+            clusters[max(rating, key=rating.get)] = count
+        count += 1
+
+    return clusters, count
+
+
+def first_choice_matching(netlist: Netlist, weights, limit, strict=False):
+    """
+    visit the cells in random order, and merge every unmatched cell into the
+    cluster of its neighbour of the highest rating, matched or not
+    :param netlist:
+    :param weights: the weight of every cell
+    :param limit: the maximum weight of a coarse cell
+    :param strict: leave a cell alone if its strong neighbours are full
+    :return: the coarse cell of every cell, and the number of coarse cells
+    """
+    n: int = netlist.get_cells_size()
+    clusters = [-1] * n
+    cluster_weights = []
+
+    def accept(other):
+        if clusters[other] < 0:
+            return weights[cid] + weights[other] <= limit
+        return cluster_weights[clusters[other]] + weights[cid] <= limit
+
+    for cid in random.sample(range(n), n):
+        if clusters[cid] >= 0:
+            continue
+        rating = _ratings(netlist, cid, accept, strict)
+        if not rating:
+            clusters[cid] = len(cluster_weights)
+            cluster_weights.append(weights[cid])
+            continue
+
+        other = max(rating, key=rating.get)
+        if clusters[other] < 0:
+            clusters[other] = len(cluster_weights)
+            cluster_weights.append(weights[other])
+        clusters[cid] = clusters[other]
+        cluster_weights[clusters[cid]] += weights[cid]
+
+    return clusters, len(cluster_weights)
+
+
+def merge_isolated(netlist: Netlist, weights, limit, clusters, count):
+    """
+    pack the cells without neighbours together, no matching ever merges them, so
+    the coarsening would stall on them, and they are not connected to anything,
+    so merging them doesn't change the cut
+    :param netlist:
+    :param weights: the weight of every cell
+    :param limit: the maximum weight of a coarse cell
+    :param clusters: the coarse cell of every cell, from a matching
+    :param count: the number of coarse cells
+    :return: the coarse cell of every cell, and the number of coarse cells
+    """
+    sizes = [0] * count
+    for cluster in clusters:
+        sizes[cluster] += 1
+
+    merged = list(range(count))  # the coarse cell every coarse cell is merged into
+    group, group_weight = -1, 0
+    for cid in range(netlist.get_cells_size()):
+        if sizes[clusters[cid]] > 1 or any(
+            len(netlist.get_pins(net)) > 1 for net in netlist.get_nets(cid)
+        ):
+            continue
+        if group >= 0 and group_weight + weights[cid] <= limit:
+            merged[clusters[cid]] = group
+            group_weight += weights[cid]
+        else:
+            group, group_weight = clusters[cid], weights[cid]
+
+    index = {}
+    for cluster in merged:
+        index.setdefault(cluster, len(index))
+    return [index[merged[cluster]] for cluster in clusters], len(index)
+
+
+MATCHINGS = {
+    "heavy-edge": heavy_edge_matching,
+    "first-choice": first_choice_matching,
+}
+
+
+def contract(netlist: Netlist, clusters, count) -> Netlist:
+    """
+    :param netlist:
+    :param clusters: the coarse cell of every cell
+    :param count: the number of coarse cells
+    :return: the coarse netlist, nets inside a single coarse cell are dropped,
+    so the cut of a coarse assignment is the cut of its projection
+    """
+    nets = []
+    for i in range(netlist.get_nets_size()):
+        pins = list(dict.fromkeys(clusters[cid] for cid in netlist.get_pins(i)))
+        if len(pins) > 1:
+            nets.append(pins)
+    return Netlist.from_nets(count, nets, netlist.benchmark)
+
+
+class Level:
+    """
+    a level of the multilevel hierarchy, and its statistics
+    """
+
+    def __init__(self, netlist: Netlist, weights) -> None:
+        self.netlist: Netlist = netlist
+        self.weights = weights
+        self.clusters = None  # the cell of the coarser level for every cell
+        self.cut = None
+        self.time = 0.0
+
+    def __str__(self):
+        return "cells = {}, nets = {}, cut = {}, time = {:.3f}s".format(
+            self.netlist.get_cells_size(),
+            self.netlist.get_nets_size(),
+            self.cut,
+            self.time,
+        )
+
+
+class MultilevelPartitioner:
+    """
+    multilevel partitioning, the netlist is coarsened by matching cells, the
+    coarsest level is partitioned exactly by branch and bound, then the result
+    is projected back level by level and refined by Fiduccia-Mattheyses
+    """
+
+    def __init__(self, matching=None, coarsest=20, partitioner=None, refiner=None):
+        """
+        :param matching: the matching used to coarsen a level, heavy edge if None
+        :param coarsest: coarsening stops at this number of cells
+        :param partitioner: the exact partitioner of the coarsest level
+        :param refiner: the refinement of every level, an FMPartitioner
+        """
+        self.matching = heavy_edge_matching if matching is None else matching
+        self.coarsest = coarsest
+        self.partitioner = (
+            Partitioner(initial=FMPartitioner()) if partitioner is None else partitioner
+        )
+        self.refiner: FMPartitioner = FMPartitioner() if refiner is None else refiner
+        self.best = -1
+        self.result = []
+        self.levels = []
+
+    def cancel(self):
+        """
+        stop the exact search of the coarsest level, the levels are still refined
+        """
+        self.partitioner.cancel()
+
+    def clear_cancel(self):
+        """
+        forget a cancel of a previous run
+        """
+        self.partitioner.clear_cancel()
+
+    def partition(self, circuit: Circuit):
+        """
+        execute the multilevel partitioning, and write the result
+        :param circuit: the circuit, or its netlist
+        :return: the best label and assignment
+        """
+        netlist: Netlist = circuit.get_netlist()
+        self.clear_cancel()
+        self.solve(netlist)
+
+        logging.info("final result = {}".format(self.best))
+
+        write_result(netlist.benchmark, self.best, self.result, netlist.digest())
+
+        return self.best, self.result
+
+    def solve(self, netlist: Netlist):
+        """
+        :param netlist:
+        :return: the best label and assignment, with floor(n / 2) cells in LEFT
+        """
+        self.levels = [Level(netlist, [1] * netlist.get_cells_size())]
+        with phase("coarsen"):
+            self.__coarsen()
+
+        # partition the coarsest level exactly, the search balances the number of
+        # cells, not their weights, so the refinement fixes the balance of weights
+        coarsest: Level = self.levels[-1]
+        start = time.time()
+        if coarsest.netlist.get_cells_size() <= self.coarsest:
+            _, assigned = self.partitioner.solve(coarsest.netlist)
+        else:  # the matching got stuck, too large for an exact search
+            logging.warning(
+                "coarsening stopped at {} cells, partitioned by fm".format(
+                    coarsest.netlist.get_cells_size()
+                )
+            )
+            with phase("search"):
+                _, assigned = self.refiner.solve(
+                    coarsest.netlist, weights=coarsest.weights
+                )
+        with phase("refine"):
+            coarsest.cut, assigned = self.refiner.refine(
+                coarsest.netlist, list(assigned), coarsest.weights
+            )
+        coarsest.time += time.time() - start
+
+        for level in reversed(self.levels[:-1]):  # project, then refine
+            start = time.time()
+            with phase("refine"):
+                assigned = [assigned[cid] for cid in level.clusters]
+                level.cut, assigned = self.refiner.refine(
+                    level.netlist, assigned, level.weights
+                )
+            level.time += time.time() - start
+
+        for i, level in enumerate(self.levels):
+            logging.info("level {}: {}".format(i, level))
+
+        self.best, self.result = self.levels[0].cut, assigned
+        return self.best, self.result
+
+    def __coarsen(self):
+        """
+        coarsen the finest level until it has at most coarsest cells, or until
+        the matching stops shrinking it, a level is matched strictly, unless that
+        stalls, and the cells without neighbours are packed together
+        """
+        total = self.levels[0].netlist.get_cells_size()
+        limit = max(2, ceil(1.5 * total / self.coarsest))
+
+        while self.levels[-1].netlist.get_cells_size() > self.coarsest:
+            start = time.time()
+            level: Level = self.levels[-1]
+            for strict in (True, False):
+                clusters, count = merge_isolated(
+                    level.netlist,
+                    level.weights,
+                    limit,
+                    *self.matching(level.netlist, level.weights, limit, strict)
+                )
+                if count <= 0.9 * level.netlist.get_cells_size():
+                    break
+            else:
+                break
+
+            weights = [0] * count
+            for cid, cluster in enumerate(clusters):
+                weights[cluster] += level.weights[cid]
+
+            level.clusters = clusters
+            coarse = Level(contract(level.netlist, clusters, count), weights)
+            coarse.time = time.time() - start
+            self.levels.append(coarse)
@@ -0,0 +1,100 @@
+from collections import deque
+from typing import List
+
+from model.netlist import Netlist
+
+
+def _degrees(netlist: Netlist) -> List[int]:
+    """
+    :param netlist:
+    :return: the number of nets of every cell
+    """
+    offsets = netlist.cell_offsets
+    return [offsets[i + 1] - offsets[i] for i in range(netlist.get_cells_size())]
+
+
+def file_order(netlist: Netlist) -> List[int]:
+    """
+    :param netlist:
+    :return: the cells in the order of the input file
+    """
+    return list(range(netlist.get_cells_size()))
+
+
+def degree_order(netlist: Netlist) -> List[int]:
+    """
+    :param netlist:
+    :return: the cells sorted by their degree, the highest first
+    """
+    degrees = _degrees(netlist)
+    return sorted(range(netlist.get_cells_size()), key=lambda i: -degrees[i])
+
+
+def bfs_order(netlist: Netlist) -> List[int]:
+    """
+    breadth first search over the cells, starting from the highest-degree cell,
+    neighbours are visited by their degree, the highest first
+    every disconnected component restarts from its highest-degree cell
+    :param netlist:
+    :return: the cells in the visited order
+    """
+    degrees = _degrees(netlist)
+    visited = [False] * netlist.get_cells_size()
+    order = []
+
+    for start in degree_order(netlist):
+        if visited[start]:
+            continue
+        visited[start] = True
+        queue = deque([start])
+        while queue:
+            cid = queue.popleft()
+            order.append(cid)
+            neighbours = {
+                other
+                for net in netlist.get_nets(cid)
+                for other in netlist.get_pins(net)
+                if not visited[other]
+            }
+            for other in sorted(neighbours, key=lambda i: -degrees[i]):
+                visited[other] = True
+                queue.append(other)
+    return order
+
+
+def cluster_order(netlist: Netlist) -> List[int]:
+    """
+    breadth first search over the nets, starting from the highest-degree cell,
+    so that the cells of a net are placed next to each other
+    :param netlist:
+    :return: the cells in the visited order
+    """
+    visited = [False] * netlist.get_cells_size()
+    seen = [False] * netlist.get_nets_size()
+    order = []
+
+    for start in degree_order(netlist):
+        if visited[start]:
+            continue
+        visited[start] = True
+        order.append(start)
+        queue = deque([start])
+        while queue:
+            for net in netlist.get_nets(queue.popleft()):
+                if seen[net]:
+                    continue
+                seen[net] = True
+                for other in netlist.get_pins(net):
+                    if not visited[other]:
+                        visited[other] = True
+                        order.append(other)
+                        queue.append(other)
+    return order
+
+
+ORDERS = {
+    "file": file_order,
+    "degree": degree_order,
+    "bfs": bfs_order,
+    "cluster": cluster_order,
+}
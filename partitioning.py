@@ -1,144 +1,721 @@
 import logging
+import os
 import random
+import time
+from multiprocessing import Pool, Value
 
+from bounds import ForcedCutBound, LowerBound
 from model.circuit import Circuit
+from model.netlist import Netlist
+from model.state import BitsetPartitionState, PartitionState
+from ordering import cluster_order
+from telemetry import (
+    BOUND_PRUNES,
+    CAPACITY_PRUNES,
+    LEAVES,
+    NODES,
+    Telemetry,
+)
+from util.checkpoint import read_checkpoint, write_checkpoint
 from util.constants import LEFT, RIGHT, NOT_SET
-from util.result import write_result
+from util.profiling import phase
+from util.result import read_previous_result, write_result
+
+# the maximum number of nodes between two checks of the time limit, the
+# checkpoint and the progress report
+CHECK_INTERVAL = 1024
+# the number of seconds between two checks, the number of nodes between them is
+# adapted to the measured cost of a node, which grows with the netlist
+CHECK_PERIOD = 0.05
+# the number of seconds between two checkpoints
+CHECKPOINT_INTERVAL = 30
+# the number of random partitions scored together by the batch evaluator
+RANDOM_CHUNK = 128
+
+# the fields of a frame in the explicit stack of the search
+NID, LABEL, LEFT_REMAIN, RIGHT_REMAIN, STAGE, BOUND = range(6)
+# the stages of a frame, the node is new, its LEFT subtree is done, both are done
+NEW, LEFT_DONE, DONE = range(3)
+
+# the partitioner and the root state of a worker process in the parallel search
+_worker = None
+_root = None
+
+
+def _init_worker(partitioner, state, incumbent):
+    global _worker, _root
+    _worker, _root = partitioner, state
+    _worker.incumbent = incumbent
+    _worker.telemetry = Telemetry(None)  # the main process reports and traces
+
+
+def _solve_subproblem(subproblem):
+    return _worker._solve_subproblem(_root, *subproblem)
 
 
 class Partitioner:
-    def __init__(self):
+    def __init__(
+        self,
+        bound: LowerBound = None,
+        order=None,
+        jobs=1,
+        initial=None,
+        time_limit=None,
+        checkpoint=None,
+        telemetry=None,
+        warm_start=False,
+        state=None,
+    ):
+        """
+        :param bound: the lower bound used for lookahead pruning
+        :param order: the strategy to order the cells before the search
+        :param jobs: the number of processes used by the search
+        :param initial: the solver of the initial incumbent, with a
+        solve(netlist, deadline) method, e.g. an FMPartitioner, random partitioning
+        if None
+        :param time_limit: the number of seconds after which the search stops with
+        the current incumbent, None for no limit, the initial incumbent is computed
+        within the same time
+        :param checkpoint: the file to save the search to, and to resume it from
+        :param telemetry: the counters, progress reports and incumbent trace of
+        the search
+        :param warm_start: start from the result in outputs/ if it was written for
+        the same netlist, and skip the search if that result is proven optimal
+        :param state: the class of the partial assignment, BitsetPartitionState
+        if None, or PartitionState with per-net pin counters
+        """
         self.best = -1
         self.result = []
         self.pruned = 0
+        self.lower = 0  # the proven lower bound of the label
+        self.time_limit = time_limit
+        self.checkpoint = checkpoint
+        self.bound: LowerBound = ForcedCutBound() if bound is None else bound
+        self.order = cluster_order if order is None else order
+        self.jobs = jobs
+        self.initial = initial
+        self.warm_start = warm_start
+        self.state = BitsetPartitionState if state is None else state
+        self.cancelled = False  # set by another thread to stop the search
+        self.telemetry: Telemetry = Telemetry() if telemetry is None else telemetry
 
-    def partition(self, circuit: Circuit):
+        # the best label found by any worker of a parallel search, in shared memory
+        self.incumbent = None
+
+        # the cells in the order they are assigned by the search
+        self.__cells = []
+        self.__deadline = None
+        self.__next_save = None
+        # the incumbent shared with the workers, while a parallel search runs
+        self.__shared = None
+        # the side of every cell fixed by the caller, None if all cells are searched
+        self.__fixed = None
+        # the state snapshot of an incumbent found by the search, not yet expanded
+        # into the result, None if the result is up to date
+        self.__snapshot = None
+
+    def cancel(self):
         """
-        execute the branch and bound partitioning
-        :param circuit:
-        :return:
+        stop the search at its next check, it keeps the best result so far, it is
+        safe to call from another thread
         """
-        self.best, self.result = self.__random_partition(circuit)
-        self.pruned = 0
+        self.cancelled = True
+        if self.__shared is not None:  # a cutoff of 0 prunes the rest of the workers
+            self.__shared.value = -1
 
-        logging.info("random partition result = {}".format(self.best))
+    def clear_cancel(self):
+        """
+        forget a cancel of a previous run, a cancel is kept until then, so a
+        cancel before the search starts still stops it
+        """
+        self.cancelled = False
 
-        n: int = circuit.get_cells_size()
-        left_remain, right_remain = int(n / 2), n - int(n / 2)
-        self.__partition(circuit, [NOT_SET] * n, 0, 0, left_remain, right_remain)
+    @property
+    def nodes(self):
+        """
+        :return: the number of nodes visited by the search
+        """
+        return self.telemetry.counters[NODES]
+
+    def partition(self, circuit: Circuit):
+        """
+        execute the branch and bound partitioning, and write the result
+        :param circuit: the circuit, or its netlist
+        :return: the best label and assignment
+        """
+        netlist: Netlist = circuit.get_netlist()
+        self.clear_cancel()
+        self.solve(netlist)
 
-        logging.info("final result = {}".format(self.best))
+        logging.info(
+            "final result = {}, lower bound = {}, gap = {}".format(
+                self.best, self.lower, self.best - self.lower
+            )
+        )
 
-        write_result(circuit.benchmark, self.best, self.result)
+        write_result(
+            netlist.benchmark,
+            self.best,
+            self.result,
+            netlist.digest(),
+            self.lower == self.best,
+        )
 
         return self.best, self.result
 
-    def __partition(
-        self, circuit: Circuit, assigned, nid, label, left_remain, right_remain
-    ):
+    def solve(self, netlist: Netlist, fixed=None, start=None):
         """
-        execute the recursive branch and bound partitioning
-        :param circuit:
-        :param assigned: the current assignment
-        :param nid: the next cell
-        :param label: the label of the current assignment
-        :param left_remain: the number of empty spaces remaining in the left
-        :param right_remain: the number of empty space remaining in the right
+        execute the branch and bound partitioning, resumed from the checkpoint if
+        there is one for the netlist
+        :param netlist:
+        :param fixed: the side of every cell that keeps its side, NOT_SET for the
+        cells to search, None to search all cells, a search with fixed cells is
+        neither warm started nor checkpointed
+        :param start: a complete assignment that agrees with fixed, the initial
+        incumbent of a search with fixed cells, random if None
+        :return: the best label and assignment, with floor(n / 2) cells in LEFT
         """
-        if left_remain == 0 and right_remain == 0:  # no node to assign
-            if self.best < 0 or label < self.best:
-                self.result = assigned.copy()
-                self.best = label
+        self.__deadline = None
+        if self.time_limit is not None:
+            self.__deadline = time.time() + self.time_limit
+        self.__next_save = time.time() + CHECKPOINT_INTERVAL
+        self.telemetry.start()
+
+        self.__fixed = fixed
+        previous = None
+        if self.warm_start and fixed is None:
+            previous = self.__previous_result(netlist)
+        if previous is not None and previous[2]:
+            self.best, self.result = previous[:2]
+            self.lower = self.best
             logging.info(
-                "pruned: {:.6%} | label = {}, best = {} | LEAF".format(
-                    self.__pruned_rate(circuit), label, self.best
+                "proven optimum on file = {}, search skipped".format(self.best)
+            )
+            return self.best, self.result
+
+        state = self.state(netlist)
+        stack = None if self.jobs > 1 or fixed else self.__resume(state)
+        if stack is None and fixed is not None:
+            stack = self.__start_fixed(state, fixed, start)
+        elif stack is None:
+            stack = self.__start(state, previous)
+
+        with phase("search"):
+            if self.jobs > 1:
+                self.__parallel_partition(state, *stack[0][:STAGE])
+            elif self.__search(state, stack):
+                self.lower = self.best
+                if self.__can_save() and os.path.exists(self.checkpoint):
+                    os.remove(self.checkpoint)
+            else:
+                self.lower = self.__lower_bound(stack)
+                logging.info("search stopped, best = {}".format(self.best))
+                self.__save(state, stack)
+        # the many small searches of fixed cells are only logged in verbose mode
+        log = logging.info if fixed is None else logging.debug
+        log("search: {}".format(self.telemetry))
+
+        return self.best, self.result
+
+    def __start(self, state: PartitionState, previous=None):
+        """
+        compute the initial incumbent and the order of the cells
+        :param state: the empty assignment
+        :param previous: the label and assignment of a previous run, the initial
+        incumbent if it is better than the one of the initial solver
+        :return: the stack with the root node
+        """
+        netlist: Netlist = state.netlist
+        with phase("seed"):
+            if self.initial is None:
+                self.best, self.result = self.__random_partition(
+                    netlist, deadline=self.__deadline
+                )
+                logging.info("random partition result = {}".format(self.best))
+            else:
+                self.best, self.result = self.initial.solve(netlist, self.__deadline)
+                logging.info("initial partition result = {}".format(self.best))
+        if previous is not None and previous[0] < self.best:
+            self.best, self.result = previous[:2]
+            logging.info("previous result = {}".format(self.best))
+        self.telemetry.improve(self.best, self.result)
+        self.pruned = 0
+
+        n: int = netlist.get_cells_size()
+        left_remain, right_remain = int(n / 2), n - int(n / 2)
+        with phase("order"):
+            self.__cells = self.order(netlist)
+
+        nid, label = 0, 0
+        if n > 0 and left_remain == right_remain:
+            # mirror images have the same label, pin the first cell into LEFT
+            self.pruned += 1 << (n - 1)
+            label = state.assign(self.__cells[0], LEFT)
+            nid, left_remain = 1, left_remain - 1
+
+        return [[nid, label, left_remain, right_remain, NEW, label]]
+
+    def __start_fixed(self, state: PartitionState, fixed, start):
+        """
+        assign the fixed cells, and search the others with the remaining capacities
+        :param state: the empty assignment
+        :param fixed: the side of every cell, NOT_SET for the cells to search
+        :param start: the initial incumbent, random if None or not feasible
+        :return: the stack with the root node
+        """
+        netlist: Netlist = state.netlist
+        n: int = netlist.get_cells_size()
+        left_remain, right_remain = int(n / 2), n - int(n / 2)
+        label = 0
+        for cid, value in enumerate(fixed):
+            if value != NOT_SET:
+                label += state.assign(cid, value)
+                if value == LEFT:
+                    left_remain -= 1
+                else:
+                    right_remain -= 1
+        if left_remain < 0 or right_remain < 0:
+            raise ValueError("the fixed cells exceed the capacity of a side")
+
+        feasible = (
+            start is not None
+            and len(start) == n
+            and sum(1 for v in start if v == LEFT) == int(n / 2)
+            and all(v == LEFT or v == RIGHT for v in start)
+            and all(f == NOT_SET or f == v for f, v in zip(fixed, start))
+        )
+        with phase("seed"):
+            if feasible:
+                self.best, self.result = netlist.calculate_label(start), list(start)
+            else:
+                self.best, self.result = self.__random_partition(
+                    netlist, fixed, self.__deadline
                 )
+        logging.debug(
+            "{} fixed cells, initial result = {}".format(
+                n - left_remain - right_remain, self.best
             )
-        else:
-            if self.best < 0 or label < self.best:
-                if left_remain > 0:  # add current cell into LEFT
-                    new_label = label + self.__calculate_delta_label(
-                        circuit, nid, assigned, LEFT
-                    )
-                    self.__partition(
-                        circuit,
-                        assigned,
-                        nid + 1,
-                        new_label,
-                        left_remain - 1,
-                        right_remain,
+        )
+        self.telemetry.improve(self.best, self.result)
+        self.pruned = 0
+
+        with phase("order"):
+            self.__cells = [cid for cid in self.order(netlist) if fixed[cid] == NOT_SET]
+        return [[0, label, left_remain, right_remain, NEW, label]]
+
+    def __search(self, state: PartitionState, stack):
+        """
+        execute the branch and bound partitioning with an explicit stack, every frame
+        is [nid, label, left_remain, right_remain, stage, bound], where
+        nid: the index of the next cell in the search order
+        label: the label of the current assignment
+        left_remain: the number of empty spaces remaining in the left
+        right_remain: the number of empty space remaining in the right
+        stage: NEW, LEFT_DONE or DONE
+        bound: the lower bound of the labels in the subtree
+        the first nid cells of the top frame are assigned in the state
+        :param state: the current assignment and its per-net pin counters
+        :param stack: the frames of the search, updated in place
+        :return: True if the search is complete, False if it stopped early
+        """
+        cells = self.__cells
+        counters = self.telemetry.counters
+        nodes = 0  # the nodes not yet added to the counters
+        interval, checked = 1, time.time()  # the nodes between checks, the last one
+
+        try:
+            while stack:
+                if nodes >= interval:
+                    counters[NODES] += nodes
+                    nodes = 0
+                    if self.__interrupted(state, stack):
+                        return False
+                    now = time.time()
+                    interval = max(
+                        1,
+                        min(
+                            CHECK_INTERVAL,
+                            int(interval * CHECK_PERIOD / max(now - checked, 1e-6)),
+                        ),
                     )
-                    assigned[nid] = NOT_SET
-                else:
+                    checked = now
+                nodes += 1
+
+                frame = stack[-1]
+                nid, label, left_remain, right_remain, stage, _ = frame
+
+                if stage == NEW:
+                    if left_remain == 0 and right_remain == 0:  # no node to assign
+                        counters[LEAVES] += 1
+                        self.__leaf(state, label)
+                        self.__pop(state, stack)
+                        continue
+
+                    best = self.__cutoff()
+                    if best >= 0 and label < best:
+                        frame[BOUND] = label + self.bound.estimate(
+                            state, cells[nid:], left_remain, right_remain
+                        )
+                    if best >= 0 and frame[BOUND] >= best:
+                        counters[BOUND_PRUNES] += 1
+                        self.pruned += 1 << (left_remain + right_remain)
+                        self.__pop(state, stack)
+                        continue
+
+                    if left_remain > 0:  # add current cell into LEFT
+                        new_label = label + state.assign(cells[nid], LEFT)
+                        stack.append(
+                            [
+                                nid + 1,
+                                new_label,
+                                left_remain - 1,
+                                right_remain,
+                                NEW,
+                                new_label,
+                            ]
+                        )
+                        frame[STAGE] = LEFT_DONE
+                        continue
+                    counters[CAPACITY_PRUNES] += 1
                     self.pruned += 1 << (right_remain - 1)
+                    frame[STAGE] = LEFT_DONE
 
-                if right_remain > 0:  # add current cell into RIGHT
-                    new_label = label + self.__calculate_delta_label(
-                        circuit, nid, assigned, RIGHT
-                    )
-                    self.__partition(
-                        circuit,
-                        assigned,
-                        nid + 1,
-                        new_label,
-                        left_remain,
-                        right_remain - 1,
-                    )
-                    assigned[nid] = NOT_SET
-                else:
-                    self.pruned += 1 << (left_remain - 1)
-            else:
-                self.pruned += 1 << (left_remain + right_remain)
+                if frame[STAGE] == LEFT_DONE:
+                    best = self.__cutoff()
+                    if right_remain == 0:
+                        counters[CAPACITY_PRUNES] += 1
+                        self.pruned += 1 << (left_remain - 1)
+                    elif best >= 0 and frame[BOUND] >= best:
+                        counters[BOUND_PRUNES] += 1
+                        self.pruned += 1 << (left_remain + right_remain - 1)
+                    else:  # add current cell into RIGHT
+                        new_label = label + state.assign(cells[nid], RIGHT)
+                        stack.append(
+                            [
+                                nid + 1,
+                                new_label,
+                                left_remain,
+                                right_remain - 1,
+                                NEW,
+                                new_label,
+                            ]
+                        )
+                        frame[STAGE] = DONE
+                        continue
+                    frame[STAGE] = DONE
 
-            logging.debug(
-                "pruned: {:.6%} | label = {}, best = {}".format(
-                    self.__pruned_rate(circuit), label, self.best
-                )
+                self.__pop(state, stack)
+        except KeyboardInterrupt:
+            logging.info("search interrupted")
+            return False
+        finally:
+            counters[NODES] += nodes
+            self.__expand(state)
+
+        return True
+
+    def __pop(self, state: PartitionState, stack):
+        """
+        pop the top frame, and unassign the cell that led to it from its parent
+        """
+        nid = stack.pop()[NID]
+        if stack:
+            state.unassign(self.__cells[nid - 1])
+
+    def __leaf(self, state: PartitionState, label):
+        """
+        update the incumbent with a complete assignment
+        """
+        if self.best < 0 or label < self.best:
+            # a snapshot of the bitset state is two masks, the list is built once
+            # the search stops, or for a listener that wants every incumbent
+            self.__snapshot = state.snapshot()
+            self.best = label
+            listener = self.telemetry.listener
+            self.telemetry.improve(
+                label, None if listener is None else state.expand(self.__snapshot)
             )
+            if self.incumbent is not None:
+                with self.incumbent.get_lock():
+                    if label < self.incumbent.value:
+                        self.incumbent.value = label
 
-    def __pruned_rate(self, circuit):
+    def __expand(self, state: PartitionState):
         """
-        :param circuit:
-        :return: the pruned rate
+        expand the snapshot of the last incumbent into the result
         """
-        return self.pruned / (1 << circuit.get_cells_size())
+        if self.__snapshot is not None:
+            self.result = state.expand(self.__snapshot)
+            self.__snapshot = None
+
+    def __cutoff(self):
+        """
+        :return: the label a subtree must beat to be searched, -1 if no incumbent
+        """
+        if self.incumbent is None:
+            return self.best
+        # only labels beating other workers are useful, ties are kept for the
+        # first subproblem so that the result matches the serial search
+        return min(self.best, self.incumbent.value + 1)
+
+    def __interrupted(self, state: PartitionState, stack):
+        """
+        :return: whether the search is cancelled or the time limit is reached, a
+        checkpoint is saved and the progress is reported if they are due
+        """
+        self.telemetry.report(self.best, lambda: self.__pruned_rate(state.netlist))
+        now = time.time()
+        if self.cancelled or (self.__deadline is not None and now >= self.__deadline):
+            return True
+        if now >= self.__next_save:
+            self.__save(state, stack)
+            self.__next_save = now + CHECKPOINT_INTERVAL
+        return False
+
+    def __lower_bound(self, stack):
+        """
+        :param stack: the frames of an unfinished search
+        :return: the lowest label that the unexplored subtrees may still reach
+        """
+        bounds = [frame[BOUND] for frame in stack if frame[STAGE] != DONE]
+        return min(bounds + [self.best])
+
+    def __save(self, state: PartitionState, stack):
+        """
+        save the search into the checkpoint file, if there is one
+        """
+        if not self.__can_save() or not stack:
+            return
+        self.__expand(state)
+        netlist: Netlist = state.netlist
+        cells = self.__cells[: stack[-1][NID]]
+        write_checkpoint(
+            self.checkpoint,
+            {
+                "benchmark": netlist.benchmark,
+                "digest": netlist.digest(),
+                "best": self.best,
+                "result": self.result,
+                "pruned": self.pruned,
+                "counters": self.telemetry.counters,
+                "order": self.__cells,
+                "path": [state.assigned[cid] for cid in cells],
+                "stack": stack,
+            },
+        )
+        logging.info("checkpoint saved to {}".format(self.checkpoint))
+
+    def __can_save(self):
+        """
+        :return: whether the search is saved into the checkpoint, only a serial
+        search of all cells is
+        """
+        return bool(self.checkpoint) and self.incumbent is None and not self.__fixed
+
+    def __resume(self, state: PartitionState):
+        """
+        restore the search from the checkpoint file, if it belongs to the netlist
+        :param state: the empty assignment, the path of the checkpoint is replayed
+        :return: the stack of the search, or None if there is nothing to resume
+        """
+        if not self.checkpoint:
+            return None
+        data = read_checkpoint(self.checkpoint)
+        if data is None:
+            return None
+        # sub-netlists share the name of their benchmark, only the content counts
+        if data.get("digest") != state.netlist.digest():
+            logging.warning(
+                "{} is the checkpoint of another netlist, not resumed".format(
+                    self.checkpoint
+                )
+            )
+            return None
+
+        self.best, self.result = data["best"], data["result"]
+        self.pruned = data["pruned"]
+        self.telemetry.merge(data["counters"])
+        self.__cells = data["order"]
+        for cid, value in zip(self.__cells, data["path"]):
+            state.assign(cid, value)
+
+        logging.info("resumed from {}, best = {}".format(self.checkpoint, self.best))
+        return data["stack"]
 
     @staticmethod
-    def __calculate_delta_label(circuit: Circuit, nid, assigned, value):
+    def __previous_result(netlist: Netlist):
+        """
+        :param netlist:
+        :return: the label, the assignment and whether it is proven optimal of the
+        result in outputs/ for the netlist, or None if there is no valid one
+        """
+        previous = read_previous_result(netlist.benchmark, netlist.digest())
+        if previous is None:
+            return None
+        label, assigned, optimal = previous
+
+        n: int = netlist.get_cells_size()
+        left = sum(1 for v in assigned if v == LEFT)
+        if len(assigned) != n or left + sum(1 for v in assigned if v == RIGHT) != n:
+            return None
+        if left != int(n / 2):
+            assigned = [-v for v in assigned]  # mirror into the search capacities
+        if sum(1 for v in assigned if v == LEFT) != int(n / 2):
+            return None
+        if netlist.calculate_label(assigned) != label:
+            return None
+        return label, assigned, optimal
+
+    def __parallel_partition(self, state, nid, label, left_remain, right_remain):
+        """
+        split the search tree at a fixed depth, and search the subproblems in a
+        process pool, the workers prune against the best label found by any of them
+        :param state: the current assignment and its per-net pin counters
+        :param nid: the index of the next cell in the search order
+        :param label: the label of the current assignment
+        :param left_remain: the number of empty spaces remaining in the left
+        :param right_remain: the number of empty space remaining in the right
+        """
+        depth = min(len(self.__cells), nid + (self.jobs * 8).bit_length())
+        subproblems = []
+        self.__split(state, nid, label, left_remain, right_remain, depth, subproblems)
+
+        logging.info(
+            "parallel search: {} subproblems on {} processes".format(
+                len(subproblems), self.jobs
+            )
+        )
+
+        incumbent = Value("i", -1 if self.cancelled else self.best)
+        self.lower = self.best
+        self.__shared = incumbent
+        with Pool(self.jobs, _init_worker, (self, state, incumbent)) as pool:
+            # results come back in the order of the serial search, on a tie the
+            # earlier subproblem wins, exactly as in the serial search
+            for i, (best, result, pruned, counters, lower) in enumerate(
+                pool.imap(_solve_subproblem, subproblems)
+            ):
+                self.pruned += pruned
+                self.telemetry.merge(counters)
+                if result is not None and best < self.best:
+                    self.best, self.result = best, result
+                    self.telemetry.publish(best, result)
+                if self.cancelled:  # the rest is only bounded by its root labels
+                    remain = [subproblem[2] for subproblem in subproblems[i:]]
+                    self.lower = min([self.lower] + remain)
+                    logging.info("search cancelled, best = {}".format(self.best))
+                    break
+                self.lower = min(self.lower, lower)
+                self.telemetry.report(
+                    self.best, lambda: self.__pruned_rate(state.netlist)
+                )
+        self.__shared = None
+        self.lower = min(self.lower, self.best)
+
+    def __split(self, state, nid, label, left_remain, right_remain, depth, subproblems):
         """
-        :param circuit:
-        :param nid: the cell id
-        :param assigned: the current assignment
-        :param value: LEFT / RIGHT
-        :return: the label changes before and after assigning the cell into LEFT / RIGHT
+        enumerate the partial assignments of the cells up to the depth, in the order
+        of the serial search
+        :param depth: the index in the search order where the subproblems start
+        :param subproblems: the list to append the subproblems to
         """
-        cell = circuit.get_cell(nid)
-        pre_label = cell.calculate_label(assigned)
-        assigned[nid] = value  # add current cell into value
-        post_label = cell.calculate_label(assigned)
-        return post_label - pre_label
+        if nid == depth or (left_remain == 0 and right_remain == 0):
+            prefix = [state.assigned[cid] for cid in self.__cells[:nid]]
+            subproblems.append(
+                (prefix, nid, label, left_remain, right_remain, self.best)
+            )
+        elif (
+            label
+            + self.bound.estimate(state, self.__cells[nid:], left_remain, right_remain)
+            >= self.best
+        ):
+            self.pruned += 1 << (left_remain + right_remain)
+        else:
+            cid = self.__cells[nid]
+            for value, left, right in (
+                (LEFT, left_remain - 1, right_remain),
+                (RIGHT, left_remain, right_remain - 1),
+            ):
+                if left < 0 or right < 0:
+                    self.pruned += 1 << (left_remain + right_remain - 1)
+                    continue
+                new_label = label + state.assign(cid, value)
+                self.__split(state, nid + 1, new_label, left, right, depth, subproblems)
+                state.unassign(cid)
+
+    def _solve_subproblem(
+        self, state, prefix, nid, label, left_remain, right_remain, best
+    ):
+        """
+        search a subproblem of the parallel search in a worker process
+        :param state: the root state, shared by all subproblems of the worker
+        :param prefix: the values of the first nid cells in the search order
+        :param best: the label of the initial incumbent
+        :return: the best label, its assignment or None if nothing beats best,
+        the pruned leaves, the counters, and the lower bound of the subproblem
+        """
+        cells = [
+            (cid, value)
+            for cid, value in zip(self.__cells[:nid], prefix)
+            if state.assigned[cid] == NOT_SET
+        ]
+        for cid, value in cells:
+            state.assign(cid, value)
+
+        self.best, self.result, self.pruned = best, None, 0
+        self.telemetry.start()
+        stack = [[nid, label, left_remain, right_remain, NEW, label]]
+        lower = self.best if self.__search(state, stack) else self.__lower_bound(stack)
+
+        while len(stack) > 1:  # back to the root of the subproblem
+            self.__pop(state, stack)
+        for cid, _ in reversed(cells):
+            state.unassign(cid)
+        return self.best, self.result, self.pruned, self.telemetry.counters, lower
+
+    def __pruned_rate(self, netlist: Netlist):
+        """
+        :param netlist:
+        :return: the pruned rate
+        """
+        return self.pruned / (1 << netlist.get_cells_size())
 
     @staticmethod
-    def __random_partition(circuit: Circuit):
+    def __random_partition(netlist: Netlist, fixed=None, deadline=None):
         """
         perfrom random partitioning on the given circuit
-        :param circuit:
+        :param netlist:
+        :param fixed: the side of every cell that keeps its side, NOT_SET for the
+        cells placed randomly, None to place all cells randomly
+        :param deadline: the time after which no more chunks are tried, None for
+        no limit
         :return: the best laebl and assignment
         """
+        n: int = netlist.get_cells_size()
+        fixed = [NOT_SET] * n if fixed is None else fixed
+        free = [cid for cid in range(n) if fixed[cid] == NOT_SET]
+        left = int(n / 2) - sum(1 for v in fixed if v == LEFT)
+
+        sides = [LEFT] * left + [RIGHT] * (len(free) - left)
         result = []
         best = -1
-        n: int = circuit.get_cells_size()
-
-        for _ in range(n):
-            cids = random.sample(range(n), n)
-
-            assigned = [NOT_SET] * n
-            for i, v in enumerate(cids):
-                assigned[v] = LEFT if i < int(n / 2) else RIGHT
+        for done in range(0, n, RANDOM_CHUNK):  # only a chunk is kept in memory
+            assignments = []
+            for _ in range(min(RANDOM_CHUNK, n - done)):
+                random.shuffle(sides)
+                if len(free) == n:
+                    assigned = list(sides)
+                else:
+                    assigned = list(fixed)
+                    for cid, v in zip(free, sides):
+                        assigned[cid] = v
+                assignments.append(assigned)
 
-            label = circuit.calculate_label(assigned)
+            labels = netlist.calculate_labels(assignments)
+            label = min(labels)
             if best < 0 or label < best:
-                best = label
-                result = assigned
+                best, result = label, assignments[labels.index(label)]
+            if deadline is not None and time.time() >= deadline:
+                break
 
         return best, result
@@ -0,0 +1,197 @@
+from math import ceil, log2, sqrt
+
+from model.netlist import Netlist
+from util.colors import net_color
+from util.constants import LEFT, LEFT_COLOR, RIGHT, RIGHT_COLOR
+
+# above this number of cells, the cells are drawn without their ids
+LABEL_LIMIT = 400
+# above this number of pins, the nets are drawn as a single bundle between the
+# halves instead of one line each
+PIN_LIMIT = 5000
+# below this size in pixels, the cells are drawn without an outline
+OUTLINE_LIMIT = 6
+
+
+class CanvasRenderer:
+    """
+    draw a bisection on a canvas, the cells of each side fill a grid, and the
+    coordinates of every cell are computed once in Python, every net is a single
+    polyline from its source to each of its sinks, a new assignment with the same
+    number of cells on each side only moves the cells that changed sides, by
+    swapping their places, and the nets on them
+    """
+
+    def __init__(self, canvas, width, height) -> None:
+        """
+        :param canvas: the canvas to draw on
+        :param width: the maximum width of the drawing
+        :param height: the maximum height of the drawing
+        """
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        self.netlist = None
+        self.assigned = None
+        self.size = 0  # the size of a cell in pixels
+        self.cols = {}  # the number of columns of each side
+        self.rows = 0
+        self.slots = []  # the place of every cell in the grid of its side
+        self.rects = []
+        self.texts = []
+        self.lines = []  # the line of every net, or the bundle between the halves
+
+    def draw(self, netlist: Netlist, assigned):
+        """
+        :param netlist:
+        :param assigned: the assignment of every cell, a cell that is not in LEFT
+        is drawn in RIGHT
+        """
+        assigned = [LEFT if v == LEFT else RIGHT for v in assigned]
+        if (
+            netlist is self.netlist
+            and len(assigned) == len(self.assigned)
+            and _count(assigned) == _count(self.assigned)
+        ):
+            self.__update(assigned)
+        else:
+            self.__redraw(netlist, assigned)
+
+    def clear(self):
+        self.canvas.delete("cells", "nets")
+        self.netlist, self.assigned = None, None
+
+    def __redraw(self, netlist: Netlist, assigned):
+        """
+        draw everything from scratch
+        """
+        self.clear()
+        self.netlist, self.assigned = netlist, assigned
+
+        left, right = _count(assigned)
+        self.cols = {LEFT: max(1, ceil(sqrt(left))), RIGHT: max(1, ceil(sqrt(right)))}
+        self.rows = max(ceil(left / self.cols[LEFT]), ceil(right / self.cols[RIGHT]), 1)
+        cols, rows = self.cols[LEFT] + self.cols[RIGHT], self.rows
+        self.size = max(1, int(min(self.width / (cols + 3), self.height / rows)))
+        self.canvas.config(
+            width=(cols + 2) * self.size,
+            height=rows * self.size + (rows - 1) * 0.5 * self.size + self.size,
+        )
+
+        filled = {LEFT: 0, RIGHT: 0}
+        self.slots = []
+        for v in assigned:
+            self.slots.append(filled[v])
+            filled[v] += 1
+
+        outline = "black" if self.size >= OUTLINE_LIMIT else ""
+        labels = netlist.get_cells_size() <= LABEL_LIMIT
+        font = ("Helvetica", max(1, int(self.size / 3)))
+        self.rects, self.texts = [], []
+        for cid in range(netlist.get_cells_size()):
+            self.rects.append(
+                self.canvas.create_rectangle(
+                    *self.__box(cid),
+                    fill=self.__color(cid),
+                    outline=outline,
+                    tags="cells",
+                )
+            )
+            if labels:
+                x, y = self.__center(cid)
+                self.texts.append(
+                    self.canvas.create_text(
+                        x, y, font=font, text=str(cid), tags="cells"
+                    )
+                )
+
+        if len(netlist.net_pins) <= PIN_LIMIT:
+            self.lines = [
+                self.canvas.create_line(
+                    *self.__net_points(i), fill=net_color(i), width=1.5, tags="nets"
+                )
+                for i in range(netlist.get_nets_size())
+            ]
+        else:
+            self.lines = [self.canvas.create_line(0, 0, 0, 0, tags="nets")]
+            self.lines.append(self.canvas.create_text(0, 0, tags="nets"))
+            self.__update_bundle()
+
+    def __update(self, assigned):
+        """
+        move the cells that changed sides, and the nets on them
+        """
+        moved = [cid for cid, v in enumerate(assigned) if v != self.assigned[cid]]
+        to_left = [cid for cid in moved if assigned[cid] == LEFT]
+        to_right = [cid for cid in moved if assigned[cid] != LEFT]
+        for a, b in zip(to_left, to_right):  # the sizes of the sides are unchanged
+            self.slots[a], self.slots[b] = self.slots[b], self.slots[a]
+        self.assigned = assigned
+
+        for cid in moved:
+            self.canvas.coords(self.rects[cid], *self.__box(cid))
+            self.canvas.itemconfigure(self.rects[cid], fill=self.__color(cid))
+            if self.texts:
+                self.canvas.coords(self.texts[cid], *self.__center(cid))
+
+        if len(self.netlist.net_pins) > PIN_LIMIT:
+            self.__update_bundle()
+            return
+        nets = {net for cid in moved for net in self.netlist.get_nets(cid)}
+        for net in nets:
+            self.canvas.coords(self.lines[net], *self.__net_points(net))
+
+    def __update_bundle(self):
+        """
+        draw the nets as one line between the halves, as wide as the cut allows
+        """
+        cut = self.netlist.calculate_label(self.assigned)
+        y = self.size * (0.5 + 0.75 * self.rows)
+        x1 = self.size * (0.5 + self.cols[LEFT] / 2)
+        x2 = self.size * (1.5 + self.cols[LEFT] + self.cols[RIGHT] / 2)
+        self.canvas.coords(self.lines[0], x1, y, x2, y)
+        self.canvas.itemconfigure(self.lines[0], width=1 + log2(1 + cut))
+        self.canvas.coords(self.lines[1], (x1 + x2) / 2, y - self.size)
+        self.canvas.itemconfigure(self.lines[1], text="{} nets cut".format(cut))
+
+    def __center(self, cid):
+        v, slot = self.assigned[cid], self.slots[cid]
+        cols = self.cols[v]
+        offset = 0 if v == LEFT else (self.cols[LEFT] + 1) * self.size
+        x = self.size // 2 + offset + (slot % cols) * self.size + self.size / 2
+        y = self.size // 2 + (slot // cols) * self.size * 1.5 + self.size / 2
+        return x, y
+
+    def __box(self, cid):
+        x, y = self.__center(cid)
+        half = self.size / 2
+        return x - half, y - half, x + half, y + half
+
+    def __color(self, cid):
+        return LEFT_COLOR if self.assigned[cid] == LEFT else RIGHT_COLOR
+
+    def __net_points(self, net):
+        """
+        :return: the points of the polyline of the net, from the source to every
+        sink and back, so that a single item draws the whole net
+        """
+        pins = self.netlist.get_pins(net)
+        if not pins:
+            return [0, 0, 0, 0]
+        source = self.__center(pins[0])
+        points = list(source)
+        for k, sink in enumerate(pins[1:]):
+            if k > 0:
+                points.extend(source)
+            points.extend(self.__center(sink))
+        if len(points) < 4:  # a net with a single pin
+            points.extend(source)
+        return points
+
+
+def _count(assigned):
+    """
+    :return: the number of cells in LEFT and in RIGHT
+    """
+    left = sum(1 for v in assigned if v == LEFT)
+    return left, len(assigned) - left
@@ -0,0 +1,248 @@
+import json
+import logging
+import math
+import random
+import time
+from multiprocessing import Event, Pool
+
+from model.circuit import Circuit
+from model.netlist import Netlist
+from util.constants import LEFT, RIGHT
+from util.profiling import phase
+from util.result import write_result
+
+# the probability of accepting an average uphill move at the initial temperature
+ACCEPTANCE = 0.8
+# the number of random swaps sampled to compute the initial temperature
+SAMPLES = 100
+
+# the annealer and the stop event of a worker process
+_annealer = None
+_stop = None
+
+
+def _init_worker(annealer, stop):
+    global _annealer, _stop
+    _annealer, _stop = annealer, stop
+
+
+def _anneal(args):
+    return _annealer.anneal(*args, stop=_stop)
+
+
+class SAPartitioner:
+    """
+    simulated annealing over balanced bisections, a move swaps a cell of LEFT with
+    a cell of RIGHT, so the balance never changes, and the change of the cut is
+    computed from the number of pins in LEFT of every net, in the time of the
+    degrees of the two cells, the temperature is lowered geometrically, and the
+    restarts are independent, so they run in parallel
+    """
+
+    def __init__(
+        self,
+        restarts=4,
+        cooling=0.95,
+        moves=None,
+        final=0.05,
+        iterations=None,
+        time_limit=None,
+        jobs=1,
+        seed=0,
+        trace=None,
+    ):
+        """
+        :param restarts: the number of annealing runs from random bisections
+        :param cooling: the factor of the temperature after every step
+        :param moves: the number of moves tried per temperature, the number of
+        cells if None
+        :param final: a run stops when the temperature falls below it
+        :param iterations: the maximum number of moves tried per run, None for
+        no limit
+        :param time_limit: the number of seconds after which the runs stop
+        :param jobs: the number of processes running the restarts
+        :param seed: the seed of the first run, the next runs count up from it
+        :param trace: the json lines file of the cut of every run over time
+        """
+        self.restarts = restarts
+        self.cooling = cooling
+        self.moves = moves
+        self.final = final
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.jobs = jobs
+        self.seed = seed
+        self.trace = trace
+        self.best = -1
+        self.result = []
+        self.__stop = Event()
+
+    def cancel(self):
+        """
+        stop the runs at their next temperature step, with their best results
+        """
+        self.__stop.set()
+
+    def clear_cancel(self):
+        """
+        forget a cancel of a previous run
+        """
+        self.__stop.clear()
+
+    def partition(self, circuit: Circuit):
+        """
+        execute the simulated annealing, and write the result
+        :param circuit: the circuit, or its netlist
+        :return: the best label and assignment
+        """
+        netlist: Netlist = circuit.get_netlist()
+        self.clear_cancel()
+        with phase("search"):
+            self.solve(netlist)
+
+        logging.info("final result = {}".format(self.best))
+
+        write_result(netlist.benchmark, self.best, self.result, netlist.digest())
+
+        return self.best, self.result
+
+    def solve(self, netlist: Netlist):
+        """
+        :param netlist:
+        :return: the best label and assignment over all runs, with floor(n / 2)
+        cells in LEFT
+        """
+        deadline = None if self.time_limit is None else time.time() + self.time_limit
+        runs = [(netlist, self.seed + i, deadline) for i in range(self.restarts)]
+        if self.jobs > 1:
+            with Pool(self.jobs, _init_worker, (self, self.__stop)) as pool:
+                results = pool.map(_anneal, runs)
+        else:
+            results = [self.anneal(*run, stop=self.__stop) for run in runs]
+
+        self.best, self.result = -1, []
+        for i, (label, assigned, trace) in enumerate(results):
+            logging.info("sa run {}: label = {}".format(self.seed + i, label))
+            if self.best < 0 or label < self.best:
+                self.best, self.result = label, assigned
+        if self.trace:
+            with open(self.trace, "w") as f:
+                for i, (_, _, trace) in enumerate(results):
+                    for elapsed, temperature, label in trace:
+                        f.write(
+                            json.dumps(
+                                {
+                                    "run": self.seed + i,
+                                    "time": round(elapsed, 6),
+                                    "temperature": temperature,
+                                    "label": label,
+                                }
+                            )
+                            + "\n"
+                        )
+        return self.best, self.result
+
+    def anneal(self, netlist: Netlist, seed, deadline=None, stop=None):
+        """
+        one annealing run from a random bisection
+        :param netlist:
+        :param seed: the seed of the run
+        :param deadline: the time at which the run stops, None for no limit
+        :param stop: the event that stops the run, None if it can't be stopped
+        :return: the best label and assignment of the run, and its trace, the
+        time, the temperature and the cut after every temperature step
+        """
+        start = time.time()
+        rng = random.Random(seed)
+        n: int = netlist.get_cells_size()
+        nets: int = netlist.get_nets_size()
+        offsets = netlist.net_offsets
+        cell_nets = [netlist.get_nets(i) for i in range(n)]
+        sizes = [offsets[i + 1] - offsets[i] for i in range(nets)]
+
+        cells = list(range(n))
+        rng.shuffle(cells)
+        lefts, rights = cells[: int(n / 2)], cells[int(n / 2) :]
+        assigned = [RIGHT] * n
+        for cid in lefts:
+            assigned[cid] = LEFT
+        if not lefts or not rights:
+            return netlist.calculate_label(assigned), assigned, []
+
+        left = [0] * nets  # the pins of every net in LEFT
+        for cid in lefts:
+            for net in cell_nets[cid]:
+                left[net] += 1
+        cut = sum(1 for net in range(nets) if 0 < left[net] < sizes[net])
+
+        mark, token = [0] * nets, 0
+
+        def delta(a, b):
+            """
+            :return: the change of the cut if a in LEFT and b in RIGHT are swapped,
+            the nets of both cells keep their counts
+            """
+            nonlocal token
+            token += 2
+            for net in cell_nets[a]:
+                mark[net] = token
+            d = 0
+            for net in cell_nets[b]:
+                if mark[net] == token:
+                    mark[net] = token + 1  # shared
+                    continue
+                count = left[net]  # b joins LEFT, the net had a pin in RIGHT
+                d += (count + 1 < sizes[net]) - (count > 0)
+            for net in cell_nets[a]:
+                if mark[net] == token:
+                    count = left[net]  # a leaves LEFT
+                    d += (count > 1) - (count < sizes[net])
+            return d
+
+        # the initial temperature accepts an average uphill swap with ACCEPTANCE
+        uphill = [
+            d
+            for d in (
+                delta(rng.choice(lefts), rng.choice(rights)) for _ in range(SAMPLES)
+            )
+            if d > 0
+        ]
+        temperature = (
+            -sum(uphill) / len(uphill) / math.log(ACCEPTANCE) if uphill else 1.0
+        )
+
+        moves = n if self.moves is None else self.moves
+        best, result = cut, assigned.copy()
+        trace, tried = [(time.time() - start, temperature, cut)], 0
+        while temperature > self.final:
+            for _ in range(moves):
+                i, j = rng.randrange(len(lefts)), rng.randrange(len(rights))
+                a, b = lefts[i], rights[j]
+                d = delta(a, b)
+                if d <= 0 or rng.random() < math.exp(-d / temperature):
+                    for net in cell_nets[a]:
+                        left[net] -= 1
+                    for net in cell_nets[b]:
+                        left[net] += 1
+                    assigned[a], assigned[b] = RIGHT, LEFT
+                    lefts[i], rights[j] = b, a
+                    cut += d
+            tried += moves
+
+            if cut < best:  # the best state is sampled once per temperature
+                best, result = cut, assigned.copy()
+            trace.append((time.time() - start, temperature, cut))
+            temperature *= self.cooling
+            if (
+                (self.iterations is not None and tried >= self.iterations)
+                or (deadline is not None and time.time() >= deadline)
+                or (stop is not None and stop.is_set())
+            ):
+                break
+
+        logging.debug(
+            "sa run {}: {} moves, label = {}, time = {:.3f}s".format(
+                seed, tried, best, time.time() - start
+            )
+        )
+        return best, result, trace
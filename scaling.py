@@ -0,0 +1,240 @@
+import argparse
+import json
+import logging
+import time
+from multiprocessing import Process, Queue
+from queue import Empty
+
+from batch import GRACE, format_table
+from fm import FMPartitioner
+from generator import GENERATORS
+from model.netlist import Netlist
+from multilevel import MultilevelPartitioner
+from partitioning import Partitioner
+from sa import SAPartitioner
+from util.logging import init_logging
+from util.profiling import peak_memory
+
+# the solvers of the sweep, created in the worker process of every run
+SOLVERS = {
+    "bnb": lambda timeout: Partitioner(initial=FMPartitioner(), time_limit=timeout),
+    "fm": lambda timeout: FMPartitioner(),
+    "multilevel": lambda timeout: MultilevelPartitioner(),
+    "sa": lambda timeout: SAPartitioner(time_limit=timeout),
+}
+
+# the default sizes of every solver, the exact search only scales to small netlists
+SIZES = {
+    "bnb": [16, 24, 32, 40],
+    "fm": [1000, 2000, 5000, 10000, 20000],
+    "multilevel": [1000, 2000, 5000, 10000, 20000],
+    "sa": [1000, 2000, 5000, 10000],
+}
+
+COLUMNS = [
+    "solver",
+    "cells",
+    "nets",
+    "planted",
+    "cut",
+    "ratio",
+    "nodes",
+    "time",
+    "peak",
+]
+
+
+def _run_solver(solver, netlist: Netlist, timeout, queue):
+    """
+    solve a netlist in a worker process, so that the peak memory is its own
+    :param solver: the name of the solver
+    :param netlist: the netlist
+    :param timeout: the number of seconds the exact search may run
+    :param queue: the queue to put the record into
+    """
+    logging.getLogger().setLevel(logging.WARNING)  # the sweep reports by itself
+    partitioner = SOLVERS[solver](timeout)
+    start = time.perf_counter()
+    cut, _ = partitioner.solve(netlist)
+    elapsed = time.perf_counter() - start
+    lower = getattr(partitioner, "lower", None)
+    queue.put(
+        dict(
+            cut=cut,
+            optimal=None if lower is None else lower == cut,
+            nodes=getattr(partitioner, "nodes", None),
+            time=elapsed,
+            peak=peak_memory(),
+        )
+    )
+
+
+def run_sweep(solvers, generator, sizes=None, seed=0, timeout=None):
+    """
+    run every solver over its sizes of generated netlists, one process per run
+    :param solvers: the names of the solvers
+    :param generator: the name of the generator of the netlists
+    :param sizes: the numbers of cells of every solver, SIZES if None
+    :param seed: the seed of the generator, the same for every size
+    :param timeout: the number of seconds per run, None for no limit
+    :return: the record of every run
+    """
+    records = []
+    for solver in solvers:
+        for cells in SIZES[solver] if sizes is None else sizes:
+            nets, planted = GENERATORS[generator](cells, seed=seed)
+            name = "{}-{}-{}".format(generator, cells, seed)
+            netlist = Netlist.from_nets(cells, nets, name)
+            record = dict(
+                solver=solver,
+                cells=cells,
+                nets=len(nets),
+                pins=len(netlist.net_pins),
+                planted=planted,
+            )
+
+            queue = Queue()
+            process = Process(
+                target=_run_solver, args=(solver, netlist, timeout, queue)
+            )
+            process.start()
+            try:
+                limit = None if timeout is None else timeout + GRACE
+                record.update(queue.get(timeout=limit), status="done")
+                record["ratio"] = record["cut"] / max(1, planted)
+            except Empty:
+                process.terminate()
+                record["status"] = "killed"
+            process.join()
+            if record["status"] == "done" and process.exitcode:
+                record["status"] = "crashed"
+
+            logging.info(
+                "{} on {}: {}".format(
+                    solver,
+                    name,
+                    ", ".join(
+                        "{} = {}".format(k, record[k])
+                        for k in ("status", "cut", "planted", "time")
+                        if k in record
+                    ),
+                )
+            )
+            records.append(record)
+    return records
+
+
+def compare(records, baseline):
+    """
+    :param records: the records of this sweep
+    :param baseline: the records of a previous sweep
+    :return: the change of the cut and the runtime of every run in both, as a table
+    """
+    previous = {(r["solver"], r["cells"]): r for r in baseline}
+    rows = [["solver", "cells", "cut", "baseline cut", "time", "speedup"]]
+    for record in records:
+        old = previous.get((record["solver"], record["cells"]))
+        if old is None or "cut" not in old or "cut" not in record:
+            continue
+        rows.append(
+            [
+                record["solver"],
+                str(record["cells"]),
+                str(record["cut"]),
+                str(old["cut"]),
+                "{:.3f}s".format(record["time"]),
+                "{:.2f}x".format(old["time"] / max(record["time"], 1e-9)),
+            ]
+        )
+    return format_table(rows)
+
+
+def format_records(records) -> str:
+    """
+    :param records: the record of every run
+    :return: the records as a table
+    """
+    rows = [COLUMNS]
+    for record in records:
+        row = []
+        for column in COLUMNS:
+            val = record.get(column)
+            if val is None:
+                row.append(record.get("status", "-") if column == "cut" else "-")
+            elif column == "ratio":
+                row.append("{:.3f}".format(val))
+            elif column == "time":
+                row.append("{:.3f}s".format(val))
+            elif column == "peak":
+                row.append("{:.1f}M".format(val / (1 << 20)))
+            else:
+                row.append(str(val))
+        rows.append(row)
+    return format_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="run the solvers over sweeps of generated netlists"
+    )
+    parser.add_argument(
+        "--solvers",
+        help="the solvers of the sweep (default: all)",
+        nargs="+",
+        choices=SOLVERS.keys(),
+        default=list(SOLVERS),
+    )
+    parser.add_argument(
+        "--generator",
+        help="the structure of the netlists (default: planted)",
+        choices=GENERATORS.keys(),
+        default="planted",
+    )
+    parser.add_argument(
+        "--sizes",
+        help="the numbers of cells, for every solver (default: per solver)",
+        nargs="+",
+        type=int,
+    )
+    parser.add_argument("--seed", help="the random seed", type=int, default=0)
+    parser.add_argument(
+        "--timeout", help="the number of seconds per run", type=float, default=60
+    )
+    parser.add_argument(
+        "--output",
+        help="the json file the results are saved into",
+        default="outputs/scaling.json",
+    )
+    parser.add_argument(
+        "--baseline", help="the json file of a previous sweep to compare with"
+    )
+    parser.add_argument(
+        "-v", "--verbose", help="enable verbose logging", action="store_true"
+    )
+    args = parser.parse_args()
+
+    init_logging(args.verbose)
+    records = run_sweep(
+        args.solvers, args.generator, args.sizes, args.seed, args.timeout
+    )
+    logging.info("sweep:\n{}".format(format_records(records)))
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {"generator": args.generator, "seed": args.seed, "runs": records},
+            f,
+            indent=2,
+        )
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (
+            baseline.get("generator") != args.generator
+            or baseline.get("seed") != args.seed
+        ):
+            logging.warning("the baseline was generated from other netlists")
+        logging.info(
+            "compared to {}:\n{}".format(
+                args.baseline, compare(records, baseline["runs"])
+            )
+        )
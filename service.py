@@ -0,0 +1,351 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from argparse import Namespace
+from collections import OrderedDict
+from multiprocessing import Event, Pipe, Process
+
+from app import create_partitioner
+from model.cache import CACHE_DIR
+from model.circuit import Circuit
+from util.logging import init_logging
+
+SOCKET = "partitioning.sock"
+# the number of seconds a cancelled job may run before it is killed
+GRACE = 5
+
+# the solver options of a job, and their defaults, as on the command line
+OPTIONS = {
+    "algo": "bnb",
+    "kway": 2,
+    "bound": "forced",
+    "order": "cluster",
+    "state": "bitset",
+    "init": "fm",
+    "matching": "heavy-edge",
+    "coarsest": 20,
+    "jobs": 1,
+    "eco": None,
+    "eco_result": None,
+    "eco_window": 30,
+    "window": None,
+    "sa_restarts": 4,
+    "sa_cooling": 0.95,
+    "sa_iterations": None,
+    "sa_seed": 0,
+    "time_limit": None,
+    "warm_start": False,
+    "report_interval": None,
+    "checkpoint": None,
+    "trace": None,
+}
+
+
+def _run_job(netlist, options, conn, cancelled):
+    """
+    partition a netlist in a worker process, and send the incumbents and the
+    result through the pipe
+    :param netlist: the netlist
+    :param options: the solver options
+    :param conn: the sending end of the pipe
+    :param cancelled: the event set by the service to cancel the job
+    """
+    os.setpgrp()  # the service kills the job with the processes of its pool
+    try:
+        partitioner = create_partitioner(Namespace(**options))
+        telemetry = getattr(partitioner, "telemetry", None)
+        if telemetry is not None:
+            telemetry.listener = lambda label, _: conn.send(("incumbent", label))
+        if hasattr(partitioner, "cancel"):
+
+            def watch():
+                cancelled.wait()
+                partitioner.cancel()
+
+            threading.Thread(target=watch, daemon=True).start()
+
+        label, assigned = partitioner.solve(netlist)
+        conn.send(("done", label, assigned, getattr(partitioner, "lower", None)))
+    except Exception as e:
+        logging.exception("job failed")
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+class PartitionService:
+    """
+    a local partitioning daemon, clients send jobs as json lines over a unix
+    socket, the parsed circuits are kept in an LRU pool, and every job runs in its
+    own worker process, forked from the service, so it pays neither the startup
+    nor the parsing, at most workers jobs run at the same time, the others wait
+    in the queue
+
+    a job is {"op": "partition", "id": ID, "benchmark": FILE, "options": {...}},
+    the options are the ones of OPTIONS, and {"op": "cancel", "id": ID} cancels
+    it, every job answers with events {"id": ID, "event": EVENT, ...}: queued,
+    started, incumbent with the label, then done with the label, the assignment,
+    the lower bound, whether it was cancelled and the time, or error
+    """
+
+    def __init__(self, workers=1, pool_size=16, cache_dir=CACHE_DIR) -> None:
+        """
+        :param workers: the number of jobs running at the same time
+        :param pool_size: the number of circuits kept in memory
+        :param cache_dir: the directory of the cache of parsed netlists, None for
+        no cache
+        """
+        self.workers = workers
+        self.pool_size = pool_size
+        self.cache_dir = cache_dir
+        self.pool = OrderedDict()  # (path, mtime, size) -> circuit, oldest first
+        self.jobs = {}  # id -> (task, cancel event)
+        self.__slots = None
+
+    async def serve(self, path=SOCKET):
+        """
+        listen on the unix socket until the service is stopped
+        :param path: the path of the socket
+        """
+        self.__slots = asyncio.Semaphore(self.workers)
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(self.__handle, path)
+        logging.info("listening on {}".format(path))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def __handle(self, reader, writer):
+        """
+        read the requests of a client, its jobs are cancelled when it disconnects
+        """
+
+        def send(message):
+            if not writer.is_closing():
+                writer.write((json.dumps(message) + "\n").encode())
+
+        owned = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    op = request["op"]
+                except (ValueError, KeyError, TypeError):
+                    send({"event": "error", "error": "invalid request"})
+                    continue
+
+                job_id = request.get("id")
+                if op == "partition":
+                    if job_id is None or job_id in self.jobs:
+                        send({"id": job_id, "event": "error", "error": "invalid id"})
+                        continue
+                    task = asyncio.create_task(self.__run(request, send))
+                    self.jobs[job_id] = task, Event()
+                    task.add_done_callback(lambda _, i=job_id: self.jobs.pop(i))
+                    owned.add(job_id)
+                elif op == "cancel":
+                    self.cancel(job_id)
+                elif op == "status":
+                    send(
+                        {
+                            "event": "status",
+                            "jobs": list(self.jobs),
+                            "pool": [key[0] for key in self.pool],
+                        }
+                    )
+                else:
+                    send({"id": job_id, "event": "error", "error": "unknown op"})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for job_id in owned:
+                self.cancel(job_id)
+            writer.close()
+
+    def cancel(self, job_id):
+        """
+        cancel a job, a queued job is dropped, a running job stops with its best
+        result so far
+        :param job_id: the id of the job
+        """
+        if job_id in self.jobs:
+            self.jobs[job_id][1].set()
+
+    async def __run(self, request, send):
+        """
+        wait for a free worker, and run the job in its own process
+        :param request: the partition request
+        :param send: the function sending an event to the client
+        """
+        job_id = request["id"]
+        start = time.time()
+        try:
+            options = dict(OPTIONS)
+            unknown = set(request.get("options", {})) - set(OPTIONS)
+            if unknown:
+                raise ValueError("unknown options: {}".format(", ".join(unknown)))
+            options.update(request.get("options", {}))
+            circuit = await self.__circuit(request["benchmark"])
+
+            send({"id": job_id, "event": "queued"})
+            async with self.__slots:
+                cancelled = self.jobs[job_id][1]
+                if cancelled.is_set():
+                    send({"id": job_id, "event": "done", "cancelled": True})
+                    return
+                send({"id": job_id, "event": "started"})
+                result = await self.__execute(circuit, options, cancelled, send, job_id)
+        except Exception as e:
+            logging.warning("job {} failed: {}".format(job_id, e))
+            send({"id": job_id, "event": "error", "error": str(e)})
+            return
+
+        if result[0] == "done":
+            _, label, assigned, lower = result
+            send(
+                {
+                    "id": job_id,
+                    "event": "done",
+                    "label": label,
+                    "assignment": assigned,
+                    "lower": lower,
+                    "cancelled": cancelled.is_set(),
+                    "time": time.time() - start,
+                }
+            )
+        else:
+            send({"id": job_id, "event": "error", "error": result[1]})
+        logging.info("job {}: {}".format(job_id, result[0]))
+
+    async def __execute(self, circuit: Circuit, options, cancelled, send, job_id):
+        """
+        run the job in a forked worker process, and forward its incumbents
+        :return: the last message of the worker, done or error
+        """
+        loop = asyncio.get_running_loop()
+        messages = asyncio.Queue()
+        receiver, sender = Pipe(duplex=False)
+        # not a daemon, so the job can run its own pool of processes
+        process = Process(
+            target=_run_job, args=(circuit.get_netlist(), options, sender, cancelled)
+        )
+        process.start()
+        sender.close()
+
+        def receive():
+            try:
+                while receiver.poll():
+                    messages.put_nowait(receiver.recv())
+            except (EOFError, OSError):  # the worker is gone
+                loop.remove_reader(receiver.fileno())
+                messages.put_nowait(None)
+
+        loop.add_reader(receiver.fileno(), receive)
+        deadline = None
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(messages.get(), 0.5)
+                except asyncio.TimeoutError:
+                    if cancelled.is_set():
+                        deadline = deadline or time.time() + GRACE
+                        if time.time() > deadline:
+                            self.__kill(process)
+                            return "error", "killed after cancel"
+                    continue
+                if message is None:
+                    return "error", "worker crashed"
+                if message[0] == "incumbent":
+                    send({"id": job_id, "event": "incumbent", "label": message[1]})
+                else:
+                    return message
+        except asyncio.CancelledError:  # the service is stopped
+            self.__kill(process)
+            raise
+        finally:
+            if not receiver.closed:
+                loop.remove_reader(receiver.fileno())
+                receiver.close()
+            await loop.run_in_executor(None, process.join)
+
+    @staticmethod
+    def __kill(process):
+        """
+        terminate a worker process and the processes of its pool
+        """
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:  # the worker is gone
+            pass
+
+    async def __circuit(self, file) -> Circuit:
+        """
+        :param file: the benchmark file
+        :return: the parsed circuit, from the pool if the file is unchanged
+        """
+        path = os.path.abspath(file)
+        stat = os.stat(path)
+        key = path, stat.st_mtime_ns, stat.st_size
+        if key in self.pool:
+            self.pool.move_to_end(key)
+            return self.pool[key]
+
+        circuit = Circuit(self.cache_dir)
+        await asyncio.get_running_loop().run_in_executor(None, circuit.parse_file, path)
+        for old in [k for k in self.pool if k[0] == path]:  # a stale version
+            del self.pool[old]
+        self.pool[key] = circuit
+        while len(self.pool) > self.pool_size:
+            self.pool.popitem(last=False)
+        return circuit
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="run the partitioner as a local service on a unix socket"
+    )
+    parser.add_argument(
+        "--socket",
+        help="the path of the socket (default: {})".format(SOCKET),
+        default=SOCKET,
+    )
+    parser.add_argument(
+        "--workers", help="the number of jobs run at once", type=int, default=1
+    )
+    parser.add_argument(
+        "--pool-size",
+        help="the number of circuits kept in memory (default: 16)",
+        type=int,
+        default=16,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="parse the benchmarks without the cache of parsed netlists",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-v", "--verbose", help="enable verbose logging", action="store_true"
+    )
+    args = parser.parse_args()
+
+    init_logging(args.verbose)
+    service = PartitionService(
+        args.workers, args.pool_size, None if args.no_cache else CACHE_DIR
+    )
+    try:
+        asyncio.run(service.serve(args.socket))
+    except KeyboardInterrupt:
+        logging.info("service stopped")
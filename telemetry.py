@@ -0,0 +1,116 @@
+import json
+import logging
+import time
+
+# the counters of a search
+NODES, LEAVES, BOUND_PRUNES, CAPACITY_PRUNES, INCUMBENTS = range(5)
+COUNTERS = ("nodes", "leaves", "bound prunes", "capacity prunes", "incumbents")
+
+
+class Telemetry:
+    """
+    the progress of a search, the search increments the counters in place, and
+    calls report every few thousand nodes, which logs them at most once per
+    interval, every improvement of the incumbent is appended to a json lines trace
+    and passed to the listener
+    """
+
+    def __init__(self, interval=10, trace=None, listener=None) -> None:
+        """
+        :param interval: the number of seconds between two progress reports,
+        None for no reports
+        :param trace: the json lines file of the incumbent improvements, None for
+        no trace
+        :param listener: called with the label and the assignment of every new
+        incumbent, in the thread of the search, e.g. to show it in the GUI
+        """
+        self.interval = interval
+        self.trace = trace
+        self.listener = listener
+        self.counters = [0] * len(COUNTERS)
+        self.__start = time.time()
+        self.__next_report = None
+
+    def start(self):
+        """
+        reset the counters and the clock, and truncate the trace
+        """
+        self.counters = [0] * len(COUNTERS)
+        self.__start = time.time()
+        if self.interval is not None:
+            self.__next_report = self.__start + self.interval
+        if self.trace:
+            open(self.trace, "w").close()
+
+    def merge(self, counters):
+        """
+        :param counters: the counters of another search, e.g. of a worker process
+        """
+        for i, val in enumerate(counters):
+            self.counters[i] += val
+
+    def improve(self, label, assigned=None):
+        """
+        count an improvement of the incumbent, and publish it
+        """
+        self.counters[INCUMBENTS] += 1
+        self.publish(label, assigned)
+
+    def publish(self, label, assigned=None):
+        """
+        pass the incumbent to the listener, and append it to the trace, with the
+        time and the nodes so far
+        """
+        if self.listener is not None and assigned is not None:
+            self.listener(label, assigned)
+        if not self.trace:
+            return
+        with open(self.trace, "a") as f:
+            f.write(
+                json.dumps(
+                    {
+                        "time": round(self.elapsed(), 6),
+                        "label": label,
+                        "nodes": self.counters[NODES],
+                    }
+                )
+                + "\n"
+            )
+
+    def report(self, best, pruned_rate):
+        """
+        log the progress if a report is due
+        :param best: the label of the incumbent
+        :param pruned_rate: a function that computes the pruned rate, it is only
+        called when a report is logged
+        """
+        if self.__next_report is None or time.time() < self.__next_report:
+            return
+        self.__next_report = time.time() + self.interval
+        logging.info(
+            "progress: {}, best = {}, pruned = {:.6%}".format(self, best, pruned_rate())
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["listener"] = None  # it lives in the process that runs the search
+        return state
+
+    def elapsed(self):
+        return time.time() - self.__start
+
+    def as_dict(self):
+        return {
+            name.replace(" ", "_"): val for name, val in zip(COUNTERS, self.counters)
+        }
+
+    def __str__(self):
+        elapsed = self.elapsed()
+        return "{:.1f}s, {}, {:.0f} nodes/s".format(
+            elapsed,
+            ", ".join(
+                "{} = {}".format(name, val)
+                for name, val in zip(COUNTERS, self.counters)
+            ),
+            self.counters[NODES] / elapsed if elapsed > 0 else 0,
+        )
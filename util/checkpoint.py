@@ -0,0 +1,24 @@
+import json
+import os
+
+
+def write_checkpoint(filename, data):
+    """
+    write the checkpoint atomically, so that an interrupted write keeps the old one
+    :param filename: the checkpoint file
+    :param data: a json serializable dict
+    """
+    tmp = "{}.tmp".format(filename)
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, filename)
+
+
+def read_checkpoint(filename):
+    """
+    :param filename: the checkpoint file
+    :return: the dict stored in the checkpoint, or None if there is no checkpoint
+    """
+    if os.path.exists(filename):
+        with open(filename, "r") as f:
+            return json.load(f)
@@ -1,33 +1,7 @@
-import random
-from typing import List
+import colorsys
 
-
-# https://gist.github.com/adewes/5884820
-
-
-def get_random_color(pastel_factor=0.5):
-    return [
-        (x + pastel_factor) / (1.0 + pastel_factor)
-        for x in [random.uniform(0, 1.0) for _ in [1, 2, 3]]
-    ]
-
-
-def color_distance(c1, c2):
-    return sum([abs(x[0] - x[1]) for x in zip(c1, c2)])
-
-
-def generate_new_color(existing_colors, pastel_factor=0.5):
-    max_distance = None
-    best_color = None
-    for _ in range(0, 10):
-        color = get_random_color(pastel_factor=pastel_factor)
-        if not existing_colors:
-            return color
-        best_distance = min([color_distance(color, c) for c in existing_colors])
-        if not max_distance or best_distance > max_distance:
-            max_distance = best_distance
-            best_color = color
-    return best_color
+# the golden ratio conjugate, consecutive multiples of it spread evenly over [0, 1)
+GOLDEN_RATIO = 0.618033988749895
 
 
 def from_rgb(rgb) -> str:
@@ -40,16 +14,11 @@ def from_rgb(rgb) -> str:
     return "#{:02X}{:02X}{:02X}".format(r, g, b)
 
 
-def random_colors(n) -> List[str]:
+def net_color(i: int) -> str:
     """
-    :param n: the number of colors required
-    :return: a list of n unique random colors
+    a color computed on demand in constant time, the hues of consecutive ids are
+    apart by the golden ratio, so nearby nets get clearly different colors
+    :param i: the id of the net
+    :return: a tkinter friendly color code
     """
-    colors, ret = [], []
-
-    for _ in range(n):
-        color = generate_new_color(colors, pastel_factor=0.3)
-        colors.append(color)
-        ret.append(from_rgb(color))
-
-    return ret
+    return from_rgb(colorsys.hsv_to_rgb((i * GOLDEN_RATIO) % 1.0, 0.5, 0.95))
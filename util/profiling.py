@@ -0,0 +1,187 @@
+import cProfile
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+# the phase that the cProfile dump covers
+PROFILED_PHASE = "search"
+
+# the profiler of the process, None if profiling is disabled
+_profiler = None
+
+# the kernel files of the memory of the process, linux only
+CLEAR_REFS = "/proc/self/clear_refs"
+STATUS = "/proc/self/status"
+
+
+class Phase:
+    """
+    the statistics of a phase, over all the times it ran
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.time = 0.0
+        self.peak = 0  # the peak resident memory during the phase in bytes
+        self.growth = 0  # the largest rise of the peak above the start in bytes
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "time": self.time,
+            "peak": self.peak,
+            "growth": self.growth,
+        }
+
+    def __str__(self):
+        return "{}: {:.3f}s, peak = {:.2f} MiB (+{:.2f} MiB), calls = {}".format(
+            self.name,
+            self.time,
+            self.peak / (1 << 20),
+            self.growth / (1 << 20),
+            self.calls,
+        )
+
+
+class Profiler:
+    """
+    record the wall time and the peak memory of the phases of a run, a phase
+    includes the phases nested in it, the high-water mark of the resident memory
+    is reset when a phase starts, so the peak of a phase is its own and not the
+    one of an earlier phase, and its growth is how far the peak rose above the
+    resident memory at the start; where the mark can't be reset, i.e. outside of
+    linux, the peak is the one of the process, and the growth is its increase
+    during the phase
+    """
+
+    def __init__(self, dump=None) -> None:
+        """
+        :param dump: the pstats file of the PROFILED_PHASE, None for no cProfile
+        """
+        self.phases = {}
+        self.dump = dump
+        self.__profile = cProfile.Profile() if dump else None
+        self.__peaks = []  # the peak of every running phase, outermost first
+
+    def stop(self):
+        if self.__profile is not None and PROFILED_PHASE in self.phases:
+            self.__profile.dump_stats(self.dump)
+
+    @contextmanager
+    def phase(self, name):
+        phase: Phase = self.phases.setdefault(name, Phase(name))
+        profile = self.__profile if name == PROFILED_PHASE else None
+        if profile is not None:
+            profile.enable()
+        if self.__peaks:  # keep the peak of the outer phase before the reset
+            self.__peaks[-1] = max(self.__peaks[-1], peak_memory())
+        base = resident_memory() if reset_peak() else peak_memory()
+        self.__peaks.append(base)
+        start = time.time()
+        try:
+            yield
+        finally:
+            phase.time += time.time() - start
+            if profile is not None:
+                profile.disable()
+            # a nested phase reset the mark, its peak is kept by the stack
+            peak = max(self.__peaks.pop(), peak_memory())
+            if self.__peaks:
+                self.__peaks[-1] = max(self.__peaks[-1], peak)
+            phase.peak = max(phase.peak, peak)
+            phase.growth = max(phase.growth, peak - base)
+            phase.calls += 1
+
+    def as_dict(self):
+        return {name: phase.as_dict() for name, phase in self.phases.items()}
+
+    def __str__(self):
+        return "\n".join(str(phase) for phase in self.phases.values())
+
+
+def peak_memory():
+    """
+    :return: the high-water mark of the resident memory of the process in bytes,
+    since the last reset_peak on linux
+    """
+    try:
+        return _status("VmHWM")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # KiB on linux
+
+
+def resident_memory():
+    """
+    :return: the resident memory of the process in bytes, linux only
+    """
+    return _status("VmRSS")
+
+
+def reset_peak() -> bool:
+    """
+    reset the high-water mark of the resident memory to the current one
+    :return: whether the mark could be reset, linux only
+    """
+    try:
+        fd = os.open(CLEAR_REFS, os.O_WRONLY)
+    except OSError:
+        return False
+    try:
+        os.write(fd, b"5")
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def _status(key):
+    """
+    :param key: a field of the status of the process in KiB, e.g. VmRSS
+    :return: the field in bytes
+    """
+    with open(STATUS) as f:
+        for line in f:
+            if line.startswith(key + ":"):
+                return int(line.split()[1]) * 1024
+    raise ValueError("{} is not in {}".format(key, STATUS))
+
+
+def enable_profiling(dump=None) -> Profiler:
+    """
+    start profiling the phases of this process
+    :param dump: the pstats file of the PROFILED_PHASE, None for no cProfile
+    :return: the profiler
+    """
+    global _profiler
+    _profiler = Profiler(dump)
+    return _profiler
+
+
+def disable_profiling():
+    """
+    stop profiling, and write the pstats file if there is one
+    :return: the profiler, or None if profiling was not enabled
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+@contextmanager
+def phase(name):
+    """
+    profile a phase of the run, nothing is recorded if profiling is disabled
+    :param name: the name of the phase
+    """
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.phase(name):
+            yield
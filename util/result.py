@@ -1,15 +1,34 @@
+import json
 import os
 
+from util.profiling import phase
 
-def write_result(filename, cost, assignment):
+
+def write_result(filename, cost, assignment, digest=None, optimal=False, parts=2):
+    """
+    write the result into outputs/filename, and its metadata into
+    outputs/filename.json, so that a later run may reuse it
+    :param filename: the name of the benchmark
+    :param cost: the label of the assignment
+    :param assignment: the assignment of every cell, LEFT / RIGHT for a
+    bisection, the index of the partition for more parts
+    :param digest: the digest of the netlist the result belongs to
+    :param optimal: whether the label is proven optimal
+    :param parts: the number of partitions
+    """
     if not os.path.exists("outputs"):
         os.makedirs("outputs")
 
-    with open("outputs/{}".format(filename), "w+") as f:
+    with phase("output"), open("outputs/{}".format(filename), "w+") as f:
         f.write(str(cost) + "\n")
         for num in assignment:
             f.write(str(num) + "\n")
 
+    with open("outputs/{}.json".format(filename), "w") as f:
+        json.dump(
+            {"digest": digest, "cost": cost, "optimal": optimal, "parts": parts}, f
+        )
+
 
 def read_result(filename):
     if os.path.exists(filename):
@@ -17,3 +36,23 @@ def read_result(filename):
             data = [int(x[:-1]) for x in f.readlines()]
 
             return data[0], data[1:]
+
+
+def read_previous_result(filename, digest):
+    """
+    :param filename: the name of the benchmark
+    :param digest: the digest of the netlist
+    :return: the label, the assignment and whether the label is proven optimal,
+    of the result in outputs/filename, or None if it was not written for the digest
+    """
+    try:
+        with open("outputs/{}.json".format(filename), "r") as f:
+            metadata = json.load(f)
+        if metadata.get("digest") != digest or metadata.get("parts", 2) != 2:
+            return None
+        cost, assignment = read_result("outputs/{}".format(filename))
+    except (OSError, ValueError, TypeError):
+        return None
+    if cost != metadata.get("cost"):  # outputs/filename was overwritten since
+        return None
+    return cost, assignment, bool(metadata.get("optimal"))
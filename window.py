@@ -0,0 +1,260 @@
+import logging
+import threading
+import time
+from collections import deque
+from multiprocessing import Event, Pool
+
+from fm import FMPartitioner
+from model.circuit import Circuit
+from model.netlist import Netlist
+from partitioning import Partitioner
+from util.constants import LEFT, NOT_SET, RIGHT
+from util.result import write_result
+
+# the exact solver of a worker process
+_solver = None
+
+
+def _init_worker(solver, stop):
+    global _solver
+    _solver = solver
+
+    def watch():  # a cancel of the refiner stops the window searched by the worker
+        stop.wait()
+        _solver.cancel()
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def _solve_window(subproblem):
+    return _solver.solve(*subproblem)
+
+
+def boundary_cells(netlist: Netlist, assigned):
+    """
+    :param netlist:
+    :param assigned: the assignment of every cell
+    :return: the cells of the cut nets, in the order of the cells
+    """
+    boundary = [False] * netlist.get_cells_size()
+    for i in range(netlist.get_nets_size()):
+        pins = netlist.get_pins(i)
+        if any(assigned[cid] != assigned[pins[0]] for cid in pins):
+            for cid in pins:
+                boundary[cid] = True
+    return [cid for cid, b in enumerate(boundary) if b]
+
+
+def window_netlist(netlist: Netlist, assigned, window):
+    """
+    the subproblem of a window, the other cells keep their sides, so they are
+    merged into an anchor cell per side, and isolated padding cells fixed on the
+    smaller side let the window keep its number of cells in LEFT
+    :param netlist:
+    :param assigned: the assignment of every cell
+    :param window: the cells of the window
+    :return: the netlist of the window, the window cells first, then the anchors
+    of LEFT and RIGHT, then the padding, the fixed side of every cell, NOT_SET
+    for the window, and the current assignment
+    """
+    index = {cid: i for i, cid in enumerate(window)}
+    anchors = {LEFT: len(window), RIGHT: len(window) + 1}
+
+    nets = {}  # a net is seen once, whichever window cell reaches it first
+    for cid in window:
+        for net in netlist.get_nets(cid):
+            if net in nets:
+                continue
+            pins = [index[c] for c in netlist.get_pins(net) if c in index]
+            sides = {assigned[c] for c in netlist.get_pins(net) if c not in index}
+            if len(sides) < 2:  # a net cut by the fixed cells is always cut
+                nets[net] = pins + [anchors[side] for side in sides]
+    nets = [pins for pins in nets.values() if len(pins) > 1]
+
+    left = sum(1 for cid in window if assigned[cid] == LEFT)
+    right = len(window) - left
+    cells = len(window) + 2 + abs(left - right)
+    pad = LEFT if left < right else RIGHT
+
+    fixed = [NOT_SET] * len(window) + [LEFT, RIGHT]
+    fixed += [pad] * (cells - len(fixed))
+    start = [assigned[cid] for cid in window] + fixed[len(window) :]
+    return Netlist.from_nets(cells, nets, netlist.benchmark), fixed, start
+
+
+class WindowRefiner:
+    """
+    exact refinement of a heuristic result, windows of connected cells of the cut
+    nets are searched by branch and bound with all the other cells fixed, and
+    every improvement is committed, the windows of a batch share no net, so
+    their improvements add up and they are searched in parallel, the rounds
+    repeat until no window improves
+    """
+
+    def __init__(self, partitioner=None, size=30, jobs=1, solver=None, rounds=None):
+        """
+        :param partitioner: the partitioner of the initial result, with a solve
+        method, an FMPartitioner if None
+        :param size: the number of cells of a window
+        :param jobs: the number of processes searching the windows of a batch
+        :param solver: the exact solver of the windows, a Partitioner
+        :param rounds: the maximum number of rounds, None until no window improves
+        """
+        self.partitioner = FMPartitioner() if partitioner is None else partitioner
+        self.size = size
+        self.jobs = jobs
+        self.solver = Partitioner() if solver is None else solver
+        self.rounds = rounds
+        self.best = -1
+        self.result = []
+        self.__stop = Event()  # set by another thread, shared with the workers
+
+    def cancel(self):
+        """
+        stop the initial partitioner if it can be stopped, and the refinement, the
+        windows being searched stop with their best results, and the improvements
+        so far are kept
+        """
+        self.__stop.set()
+        if hasattr(self.partitioner, "cancel"):
+            self.partitioner.cancel()
+        self.solver.cancel()
+
+    def clear_cancel(self):
+        """
+        forget a cancel of a previous run
+        """
+        self.__stop.clear()
+        if hasattr(self.partitioner, "clear_cancel"):
+            self.partitioner.clear_cancel()
+        self.solver.clear_cancel()
+
+    def partition(self, circuit: Circuit):
+        """
+        execute the partitioning, refine its result, and write it
+        :param circuit: the circuit, or its netlist
+        :return: the best label and assignment
+        """
+        netlist: Netlist = circuit.get_netlist()
+        self.clear_cancel()
+        self.solve(netlist)
+
+        logging.info("final result = {}".format(self.best))
+
+        write_result(netlist.benchmark, self.best, self.result, netlist.digest())
+
+        return self.best, self.result
+
+    def solve(self, netlist: Netlist):
+        """
+        :param netlist:
+        :return: the best label and assignment, with floor(n / 2) cells in LEFT
+        """
+        _, assigned = self.partitioner.solve(netlist)
+        return self.refine(netlist, list(assigned))
+
+    def refine(self, netlist: Netlist, assigned):
+        """
+        :param netlist:
+        :param assigned: the initial assignment, it is modified in place
+        :return: the label and the refined assignment, with the same number of
+        cells in LEFT
+        """
+        label = netlist.calculate_label(assigned)
+        logging.info("window refinement from {}".format(label))
+        pool = None
+        if self.jobs > 1:
+            pool = Pool(self.jobs, _init_worker, (self.solver, self.__stop))
+        try:
+            rounds = 0
+            while not self.__stop.is_set() and (
+                self.rounds is None or rounds < self.rounds
+            ):
+                rounds += 1
+                start = time.time()
+                gain, windows = self.__round(netlist, assigned, pool)
+                label -= gain
+                logging.info(
+                    "round {}: {} windows, label = {}, time = {:.3f}s".format(
+                        rounds, windows, label, time.time() - start
+                    )
+                )
+                if gain == 0:
+                    break
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.best, self.result = label, assigned
+        return self.best, self.result
+
+    def __round(self, netlist: Netlist, assigned, pool):
+        """
+        search every window once, batch by batch, and commit the improvements
+        :return: the decrease of the label, and the number of windows
+        """
+        windows = self.__windows(netlist, assigned)
+        gain = 0
+        for batch in self.__batches(netlist, windows):
+            if self.__stop.is_set():
+                break
+            subproblems = [window_netlist(netlist, assigned, w) for w in batch]
+            if pool is None:
+                results = [self.solver.solve(*s) for s in subproblems]
+            else:
+                results = pool.map(_solve_window, subproblems)
+
+            for window, (sub, _, start), (label, result) in zip(
+                batch, subproblems, results
+            ):
+                before = sub.calculate_label(start)
+                if 0 <= label < before:
+                    gain += before - label
+                    for i, cid in enumerate(window):
+                        assigned[cid] = result[i]
+        return gain, len(windows)
+
+    def __windows(self, netlist: Netlist, assigned):
+        """
+        :return: the windows covering the cells of the cut nets, each grown
+        breadth first from a boundary cell through the boundary cells
+        """
+        boundary = set(boundary_cells(netlist, assigned))
+        covered, windows = set(), []
+        for seed in sorted(boundary):
+            if seed in covered:
+                continue
+            window, queue = [seed], deque([seed])
+            covered.add(seed)
+            while queue and len(window) < self.size:
+                for net in netlist.get_nets(queue.popleft()):
+                    for cid in netlist.get_pins(net):
+                        if (
+                            cid in boundary
+                            and cid not in covered
+                            and len(window) < self.size
+                        ):
+                            covered.add(cid)
+                            window.append(cid)
+                            queue.append(cid)
+            if len(window) > 1:
+                windows.append(window)
+        return windows
+
+    @staticmethod
+    def __batches(netlist: Netlist, windows):
+        """
+        :return: the windows in batches, the windows of a batch share no net
+        """
+        batches = []  # the windows and the nets of every batch
+        for window in windows:
+            nets = {net for cid in window for net in netlist.get_nets(cid)}
+            for batch, used in batches:
+                if not nets & used:
+                    batch.append(window)
+                    used |= nets
+                    break
+            else:
+                batches.append(([window], nets))
+        return [batch for batch, _ in batches]